@@ -0,0 +1,267 @@
+"""Headless benchmark of the session hot paths with synthetic games.
+
+Drives MainApp the way the UI does (startup to the first frame, add_player,
+calculate_buy, calculate_all, save_game_data, restore_game_data, refresh_log, an indexed log search,
+name suggestions per keystroke, a roster import, and the frames of the chunked startup restore) against Kivy's offscreen SDL
+window with the mock GL backend, so it runs on a Linux box or CI runner with
+no display. Each sample includes one Clock tick so deferred work (RecycleView
+refreshes, triggers) is counted. Latencies come from a plain pass; peak
+traced memory per workload from a second pass under tracemalloc, whose
+overhead would otherwise distort the timings. The report is written as JSON.
+
+Run from the repository root:
+
+    python benchmarks/bench_session.py --output bench_session.json
+    python benchmarks/bench_session.py --players 500 --buy-ins 5000 --baseline bench_session.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Headless Kivy: must be configured before kivy is imported
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+os.environ.setdefault('KIVY_NO_FILELOG', '1')
+os.environ.setdefault('KIVY_GL_BACKEND', 'mock')
+os.environ.setdefault('KIVY_WINDOW', 'sdl2')
+os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kivy.config import Config  # noqa: E402
+Config.set('graphics', 'maxfps', '0')  # don't sleep in Clock.tick()
+
+import kivy  # noqa: E402
+from kivy.clock import Clock  # noqa: E402
+from kivy.core.window import Window  # noqa: E402
+
+from names import NameIndex  # noqa: E402
+from perf import percentile  # noqa: E402
+from taki import MainApp  # noqa: E402
+
+
+class Workload:
+    """Collects per-call latencies and the peak traced memory of one workload"""
+
+    def __init__(self, name, results, track_memory):
+        self.name = name
+        self.results = results
+        self.track_memory = track_memory
+        self.samples = []
+
+    def __enter__(self):
+        if self.track_memory:
+            tracemalloc.reset_peak()
+            self._base = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def run(self, fn, *args):
+        start = time.perf_counter()
+        fn(*args)
+        Clock.tick()
+        self.samples.append((time.perf_counter() - start) * 1000)
+
+    def __exit__(self, *exc):
+        samples = sorted(self.samples)
+        result = {
+            'count': len(samples),
+            'mean_ms': sum(samples) / len(samples) if samples else 0.0,
+            'p50_ms': percentile(samples, 0.50),
+            'p90_ms': percentile(samples, 0.90),
+            'p99_ms': percentile(samples, 0.99),
+            'max_ms': samples[-1] if samples else 0.0,
+        }
+        if self.track_memory:
+            result['peak_kib'] = (tracemalloc.get_traced_memory()[1] - self._base) / 1024
+        self.results[self.name] = result
+        return False
+
+
+def first_frame(app):
+    """Build the app onto the window and draw one frame the way the event loop does"""
+    Window.add_widget(app.build())
+    Clock.tick()
+    Window.dispatch('on_draw')
+    Window.dispatch('on_flip')
+
+
+def new_app(restore=None, startup=None):
+    """Build a MainApp on the headless window and let any startup restore finish
+
+    If startup is a Workload, the time to the first frame is recorded in it; if
+    restore is one, every frame of the restore is.
+    """
+    for child in list(Window.children):
+        Window.remove_widget(child)
+    app = MainApp()
+    if startup:
+        startup.run(first_frame, app)
+    else:
+        first_frame(app)
+    while app.restoring:
+        if restore:
+            restore.run(lambda: None)
+        else:
+            Clock.tick()
+    for _ in range(3):
+        Clock.tick()
+    return app
+
+
+def run_benchmarks(args, track, files=None):
+    """Run every workload once; if files is a dict, the size of the save file is put in it"""
+    rng = random.Random(args.seed)
+    results = {}
+    # Keep each pass's save, journal and log files away from a real session and from each other
+    tempfile.tempdir = tempfile.mkdtemp(prefix='taki-bench-')
+    if track:
+        tracemalloc.start()
+
+    with Workload('startup_empty', results, track) as w:
+        app = new_app(startup=w)
+
+    with Workload('add_player', results, track) as w:
+        for i in range(args.players):
+            app.player_name_input.text = f"player{i}"
+            w.run(app.add_player, None)
+
+    with Workload('calculate_buy', results, track) as w:
+        for _ in range(args.buy_ins):
+            index = rng.randrange(args.players)
+            app.player_list.data[index]['buy'] = str(rng.choice((20, 50, 100)))
+            w.run(app.player_list.calculate_buy, index)
+
+    for index in range(args.players):
+        app.ledger.set_chips(index, rng.randrange(0, 500))
+        app.ledger.set_debt(index, rng.choice((0, 0, 50)))
+
+    with Workload('calculate_all', results, track) as w:
+        for _ in range(args.repeat):
+            w.run(app.calculate_all, None)
+
+    def full_save():
+        # Debounced request plus the write it eventually causes: commit, snapshot, wait for the disk
+        app.save_game_data()
+        app.flush_game_data()
+        app.journal.snapshot()
+        app.save_worker.flush()
+
+    with Workload('save_game_data', results, track) as w:
+        for _ in range(args.repeat):
+            w.run(full_save)
+    if files is not None:
+        files['save_file_bytes'] = os.path.getsize(app.save_file_path)
+
+    for i in range(args.log_lines):
+        name = f"player{i % max(args.players, 1)}"
+        app.log_event(f"{name.capitalize()} bought in for 50 (Total: {i})", name)
+    app.on_stop()
+
+    with Workload('startup_saved', results, track) as s, Workload('restore_frame', results, track) as w:
+        app = new_app(restore=w, startup=s)
+    def full_restore():
+        # Read on the worker thread, then one chunk of rows per frame until all are in
+        app.restore_game_data()
+        while app.restoring:
+            Clock.tick()
+
+    with Workload('restore_game_data', results, track) as w:
+        for _ in range(args.repeat):
+            w.run(full_restore)
+
+    with Workload('refresh_log_full', results, track) as w:
+        w.run(app.refresh_log)
+
+    with Workload('refresh_log_incremental', results, track) as w:
+        for i in range(args.repeat):
+            for j in range(10):
+                app.log_event(f"Incremental entry {i}.{j}")
+            w.run(app.refresh_log)
+
+    with Workload('log_find_player', results, track) as w:
+        for _ in range(args.repeat):
+            w.run(app.log_writer.find, f"player{rng.randrange(max(args.players, 1))}")
+
+    # A regulars list ten times the table, as if loaded from the history
+    index = NameIndex()
+    for i in range(args.players * 10):
+        index.add(f"regular{i}", rng.randrange(1, 50))
+    app.set_name_index(index)
+    with Workload('name_suggest', results, track) as w:
+        for _ in range(args.repeat):
+            name = f"regular{rng.randrange(args.players * 10)}"
+            for end in range(1, len(name) + 1):
+                w.run(setattr, app.player_name_input, 'text', name[:end])
+    app.player_name_input.text = ""
+
+    with Workload('import_roster', results, track) as w:
+        for r in range(args.repeat):
+            roster = [f"guest{r}-{i}" for i in range(args.players)]
+            w.run(app.add_players, roster)
+    app.on_stop()
+
+    if track:
+        tracemalloc.stop()
+    return results
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    print(f"{'workload':<26} {'p50 ms':>9} {'base':>9} {'ratio':>7} {'p99 ms':>9} {'base':>9} {'ratio':>7}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<26} {result['p50_ms']:>9.3f} {'-':>9} {'-':>7}")
+            continue
+        ratios = [result[key] / base[key] if base[key] else float('inf') for key in ('p50_ms', 'p99_ms')]
+        print(f"{name:<26} {result['p50_ms']:>9.3f} {base['p50_ms']:>9.3f} {ratios[0]:>7.2f} "
+              f"{result['p99_ms']:>9.3f} {base['p99_ms']:>9.3f} {ratios[1]:>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=200)
+    parser.add_argument('--buy-ins', type=int, default=2000)
+    parser.add_argument('--log-lines', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=20, help="samples for calculate/save/load/refresh")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--baseline', help="JSON report of a previous run to compare against")
+    args = parser.parse_args()
+
+    files = {}
+    results = run_benchmarks(args, track=False, files=files)
+    if not args.no_memory:
+        for name, result in run_benchmarks(args, track=True).items():
+            results[name]['peak_kib'] = result['peak_kib']
+    report = {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'kivy': kivy.__version__,
+            'platform': platform.platform(),
+        },
+        'params': {key: getattr(args, key) for key in ('players', 'buy_ins', 'log_lines', 'repeat', 'seed')},
+        'results': results,
+        'files': files,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Measure how settle() scales with the number of players.
+
+Run from the repository root:
+
+    python benchmarks/bench_settlement.py
+    python benchmarks/bench_settlement.py --sizes 10 100 1000 --repeat 50
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from settlement import settle  # noqa: E402
+
+
+def random_table(players, rng):
+    """Balanced table: every player's chips minus buy-ins, summing to zero"""
+    balances = [rng.randrange(-20, 21) * 25 for _ in range(players - 1)]
+    balances.append(-sum(balances))
+    return [(f"player{i}", balance) for i, balance in enumerate(balances)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 10, 25, 100, 250, 500, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'players':>8} {'transfers':>10} {'median ms':>10} {'max ms':>10}")
+    for size in args.sizes:
+        timings = []
+        transfers = 0
+        for _ in range(args.repeat):
+            table = random_table(size, rng)
+            start = time.perf_counter()
+            transfers = len(settle(table))
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{size:>8} {transfers:>10} {statistics.median(timings):>10.3f} {max(timings):>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
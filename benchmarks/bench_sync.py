@@ -0,0 +1,87 @@
+"""Measure sync traffic and latency against a localhost server as the table grows.
+
+Two clients share a table; one makes a batch of buy-ins and the other waits to
+see them. Bytes on the wire should follow the number of changes, not the
+number of players.
+
+Run from the repository root:
+
+    python benchmarks/bench_sync.py
+    python benchmarks/bench_sync.py --sizes 10 100 1000 --changes 20
+"""
+import argparse
+import asyncio
+import os
+import queue
+import random
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger import Ledger  # noqa: E402
+from sync import SyncClient, SyncServer  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def pump(main_queue, clients, done, timeout=10.0):
+    """Run the clients' main-thread work until done() or the timeout"""
+    end = time.perf_counter() + timeout
+    while not done() and time.perf_counter() < end:
+        try:
+            main_queue.get(timeout=0.005)()
+        except queue.Empty:
+            pass
+        for client in clients:
+            client.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    parser.add_argument('--changes', type=int, default=10, help="buy-ins per measured batch")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'players':>8} {'initial B':>10} {'batch B sent':>13} {'batch B recv':>13} {'latency ms':>11}")
+    for size in args.sizes:
+        port = free_port()
+        threading.Thread(target=lambda: asyncio.run(SyncServer().serve('127.0.0.1', port)), daemon=True).start()
+        time.sleep(0.2)
+        main_queue = queue.Queue()
+        dealer, viewer = Ledger(), Ledger()
+        for i in range(size):
+            dealer.add_player(f"player{i}")
+        clients = [SyncClient('127.0.0.1', port, main_queue.put) for _ in range(2)]
+        clients[0].attach(dealer)
+        clients[1].attach(viewer)
+        for client in clients:
+            client.start()
+        pump(main_queue, clients, lambda: len(viewer) == size)
+        initial = clients[1].bytes_received
+
+        sent, received = clients[0].bytes_sent, clients[1].bytes_received
+        expected = viewer.total_buy
+        start = time.perf_counter()
+        for _ in range(args.changes):
+            amount = rng.choice((20, 50, 100))
+            dealer.buy(rng.randrange(size), amount)
+            expected += amount
+        pump(main_queue, clients, lambda: viewer.total_buy == expected)
+        latency = (time.perf_counter() - start) * 1000
+        print(f"{size:>8} {initial:>10} {clients[0].bytes_sent - sent:>13} "
+              f"{clients[1].bytes_received - received:>13} {latency:>11.1f}")
+        for client in clients:
+            client.stop()
+
+
+if __name__ == '__main__':
+    main()
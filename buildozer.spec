@@ -19,7 +19,7 @@ source.include_exts = py,png,jpg,kv,atlas
 source.exclude_exts = spec
 
 # (list) List of directory to exclude (let empty to not exclude anything)
-source.exclude_dirs = tests, bin, .buildozer, .git, .github
+source.exclude_dirs = tests, bin, benchmarks, .buildozer, .git, .github
 
 # (list) List of exclusions using pattern matching
 source.exclude_patterns = license,images/originals/*
@@ -29,7 +29,7 @@ version = 0.1
 
 # (list) Application requirements
 # comma separated e.g. requirements = sqlite3,kivy
-requirements = python3,kivy
+requirements = python3,kivy,numpy,sqlite3
 
 # (list) Permissions
 android.permissions = WRITE_EXTERNAL_STORAGE,READ_EXTERNAL_STORAGE
@@ -0,0 +1,156 @@
+import sqlite3
+import threading
+from datetime import datetime
+
+from ledger import parse_amount
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    comments TEXT NOT NULL DEFAULT '',
+    archived_at TEXT NOT NULL,
+    total_buy INTEGER NOT NULL,
+    total_chips INTEGER NOT NULL,
+    total_debt INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    seat INTEGER NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    total_buy INTEGER NOT NULL,
+    chips INTEGER NOT NULL,
+    debt INTEGER NOT NULL,
+    net INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buy_ins (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    player_id INTEGER NOT NULL REFERENCES players(id) ON DELETE CASCADE,
+    amount INTEGER NOT NULL,
+    time INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions(date);
+CREATE INDEX IF NOT EXISTS idx_players_name ON players(name, session_id);
+CREATE INDEX IF NOT EXISTS idx_players_session ON players(session_id);
+CREATE INDEX IF NOT EXISTS idx_buy_ins_player ON buy_ins(player_id);
+"""
+
+
+def month_bounds(month):
+    """Turn 'YYYY-MM' into the [first day, first day of next month) date strings"""
+    year, mon = (int(part) for part in month.split('-'))
+    next_year, next_mon = (year + 1, 1) if mon == 12 else (year, mon + 1)
+    return f"{year:04d}-{mon:02d}-01", f"{next_year:04d}-{next_mon:02d}-01"
+
+
+class HistoryDB:
+    """SQLite archive of finished sessions, their players and buy-ins"""
+
+    def __init__(self, path):
+        self.path = path
+        self._threads = []
+        conn = self.connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def connect(self):
+        """Open a connection; each thread uses its own"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def archive(self, game_data):
+        """Store a finished game (as produced by Ledger.to_dict) and return its session id"""
+        players = game_data.get('players', [])
+        rows = [(parse_amount(p.get('total_buy', 0)), parse_amount(p.get('chips', 0)), parse_amount(p.get('debt', 0)))
+                for p in players]
+        conn = self.connect()
+        try:
+            with conn:
+                cur = conn.execute(
+                    "INSERT INTO sessions (date, comments, archived_at, total_buy, total_chips, total_debt) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (game_data.get('date') or datetime.now().strftime("%Y-%m-%d"),
+                     game_data.get('comments', ""),
+                     datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                     sum(r[0] for r in rows), sum(r[1] for r in rows), sum(r[2] for r in rows)))
+                session_id = cur.lastrowid
+                player_ids = []
+                for seat, (player, (total_buy, chips, debt)) in enumerate(zip(players, rows)):
+                    cur = conn.execute(
+                        "INSERT INTO players (session_id, seat, name, total_buy, chips, debt, net) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (session_id, seat, player['name'], total_buy, chips, debt, chips - total_buy))
+                    player_ids.append(cur.lastrowid)
+                conn.executemany(
+                    "INSERT INTO buy_ins (session_id, player_id, amount, time) VALUES (?, ?, ?, ?)",
+                    [(session_id, player_ids[index], amount, when)
+                     for index, amount, when in game_data.get('buy_ins', []) if index < len(player_ids)])
+            return session_id
+        finally:
+            conn.close()
+
+    def archive_async(self, game_data):
+        """Archive on a worker thread so clearing a game never waits on the database"""
+        previous = self._threads[-1] if self._threads else None
+
+        def run():
+            if previous:
+                previous.join()  # keep sessions in the order they were cleared
+            try:
+                session_id = self.archive(game_data)
+                print(f"Game archived as session {session_id}")
+            except Exception as e:
+                print(f"Error archiving game: {e}")
+
+        self._threads = [t for t in self._threads if t.is_alive()]
+        thread = threading.Thread(target=run, name='HistoryArchive', daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def wait(self):
+        """Block until every pending archive has been written"""
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _query(self, sql, params=()):
+        conn = self.connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def player_lifetime(self, name):
+        """Return (sessions played, total bought in, net result) for a player across all sessions"""
+        return self._query(
+            "SELECT COUNT(*), COALESCE(SUM(total_buy), 0), COALESCE(SUM(net), 0) FROM players WHERE name = ?",
+            (name,))[0]
+
+    def player_lifetime_net(self, name):
+        return self.player_lifetime(name)[2]
+
+    def biggest_winners(self, month, limit=5):
+        """Return [(name, net)] of the players who won the most in month ('YYYY-MM')"""
+        start, end = month_bounds(month)
+        return self._query(
+            "SELECT p.name, SUM(p.net) AS total FROM sessions s JOIN players p ON p.session_id = s.id "
+            "WHERE s.date >= ? AND s.date < ? GROUP BY p.name ORDER BY total DESC LIMIT ?",
+            (start, end, limit))
+
+    def sessions_between(self, start, end):
+        """Return [(id, date, comments, total_buy, total_chips)] for sessions dated start..end inclusive"""
+        return self._query(
+            "SELECT id, date, comments, total_buy, total_chips FROM sessions "
+            "WHERE date >= ? AND date <= ? ORDER BY date, id",
+            (start, end))
+
+    def player_name_counts(self):
+        """Return [(name, sessions played)] for every archived player, names compared ignoring case"""
+        return self._query("SELECT name, COUNT(*) FROM players GROUP BY name ORDER BY name")
@@ -0,0 +1,238 @@
+import glob
+import json
+import os
+from collections import deque
+from contextlib import contextmanager
+
+import snapshot as snapshot_format
+from ledger import Ledger
+
+
+class Journal:
+    """Append-only journal of ledger events with a snapshot every snapshot_every events
+
+    Events are appended one JSON line at a time to segment files named
+    <journal_prefix>.<first seq>.jsonl. Taking a snapshot starts a new segment
+    and, once the snapshot is on disk, deletes the segments it covers, so a load
+    never replays more than snapshot_every events. Consecutive edits of the same
+    chips, debt or comments field are coalesced into one event until flush().
+
+    Snapshots are written in the binary format of the snapshot module. A
+    snapshot found only at legacy_path, in the older JSON format, is loaded from
+    there and rewritten in the binary format straight away.
+    """
+
+    COALESCED = ('set_chips', 'set_debt', 'set_comments')
+    UNDO_LIMIT = 500
+
+    def __init__(self, snapshot_path, journal_prefix, save_worker, snapshot_every=100, legacy_path=None):
+        self.snapshot_path = snapshot_path
+        self.legacy_path = legacy_path
+        self.journal_prefix = journal_prefix
+        self.save_worker = save_worker
+        self.snapshot_every = snapshot_every
+        self.ledger = None
+        self.seq = 0
+        self.since_snapshot = 0
+        self.undo_stack = deque(maxlen=self.UNDO_LIMIT)
+        self.redo_stack = []
+        self._file = None
+        self._pending = None  # coalesced edit not yet written
+        self._mode = None  # 'undo' or 'redo' while re-applying events, 'remote' while applying another device's
+
+    def _segment_path(self, start):
+        return f"{self.journal_prefix}.{start:010d}.jsonl"
+
+    def _segments(self):
+        """List (first seq, path) for every segment on disk, oldest first"""
+        segments = []
+        for path in glob.glob(f"{glob.escape(self.journal_prefix)}.*.jsonl"):
+            try:
+                segments.append((int(path[len(self.journal_prefix) + 1:-len('.jsonl')]), path))
+            except ValueError:
+                continue
+        return sorted(segments)
+
+    def has_saved_data(self):
+        return (os.path.exists(self.snapshot_path) or bool(self.legacy_path and os.path.exists(self.legacy_path))
+                or bool(self._segments()))
+
+    def attach(self, ledger):
+        """Record every mutation of ledger from now on"""
+        if self.ledger is not None and self.record in self.ledger.listeners:
+            self.ledger.listeners.remove(self.record)
+        self.ledger = ledger
+        ledger.listeners.append(self.record)
+
+    def load(self):
+        """Restore the latest snapshot, replay the events after it and return the attached ledger"""
+        snapshot_seq = 0
+        migrate = False
+        if os.path.exists(self.snapshot_path):
+            ledger, snapshot_seq = snapshot_format.load(self.snapshot_path)
+        elif self.legacy_path and os.path.exists(self.legacy_path):
+            ledger, snapshot_seq = snapshot_format.load_json(self.legacy_path)
+            migrate = True
+        else:
+            ledger = Ledger()
+        self.seq = snapshot_seq
+        for start, path in self._segments():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        seq, *event = json.loads(line)
+                    except ValueError:
+                        break  # torn write at the end of a crashed session
+                    if seq > self.seq:
+                        ledger.apply(event)
+                        self.seq = seq
+        self.since_snapshot = self.seq - snapshot_seq
+        self.undo_stack.clear()
+        self.redo_stack = []
+        self.attach(ledger)
+        if migrate:
+            self.snapshot()
+        return ledger
+
+    def start_new(self):
+        """Delete the journal and snapshot and return a fresh attached ledger"""
+        self._pending = None
+        self._close_segment()
+        self.save_worker.flush()
+        for _, path in self._segments():
+            os.remove(path)
+        for path in (self.snapshot_path, self.legacy_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+        self.seq = 0
+        self.since_snapshot = 0
+        self.undo_stack.clear()
+        self.redo_stack = []
+        ledger = Ledger()
+        self.attach(ledger)
+        return ledger
+
+    def record(self, event):
+        """Ledger listener: journal one mutation"""
+        if self._mode is not None:
+            # Undo/redo write straight through and manage the stacks themselves
+            if self._mode == 'remote' and event[0] in ('add_player', 'remove_player'):
+                # Seats shifted under the local history, whose inverses point at seats by position
+                self.undo_stack.clear()
+                self.redo_stack = []
+            self._write(event)
+            self._snapshot_if_due()
+            return
+        self.redo_stack = []
+        pending = self._pending
+        if pending is not None:
+            same_field = pending[0] == event[0] and (event[0] == 'set_comments' or pending[1] == event[1])
+            if same_field:
+                merged = event[:-2] + (pending[-2], event[-1])
+                self._pending = merged if merged[-2] != merged[-1] else None
+                return
+            self._write_pending()
+        if event[0] in self.COALESCED:
+            self._pending = event
+        else:
+            self._write(event)
+        # Only now does the journal cover every change the ledger already holds
+        self._snapshot_if_due()
+
+    def flush(self):
+        """Write a coalesced edit that is still being held back"""
+        self._write_pending()
+        self._snapshot_if_due()
+
+    def _write_pending(self):
+        if self._pending is not None:
+            event, self._pending = self._pending, None
+            self._write(event)
+
+    def _write(self, event):
+        self.seq += 1
+        if self._mode in (None, 'redo'):
+            self.undo_stack.append(event)
+        try:
+            if self._file is None:
+                self._file = open(self._segment_path(self.seq), 'a', encoding='utf-8')
+            self._file.write(json.dumps([self.seq, *event]) + "\n")
+            self._file.flush()
+        except Exception as e:
+            print(f"Error writing journal: {e}")
+        self.since_snapshot += 1
+
+    def _snapshot_if_due(self):
+        """Snapshot once snapshot_every events were written; call only between ledger events, not halfway through one"""
+        if self.since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def _close_segment(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def snapshot(self):
+        """Hand a full snapshot to the save worker and start a new journal segment"""
+        if self.ledger is None:
+            return
+        self._write_pending()
+        self._close_segment()
+        self.since_snapshot = 0
+        self.save_worker.submit(snapshot_format.Snapshot(self.ledger, self.seq), on_saved=self._drop_segments)
+
+    def _drop_segments(self, snapshot):
+        """Delete the segments and legacy save a snapshot now on disk makes redundant (runs on the save worker)"""
+        paths = [path for start, path in self._segments() if start <= snapshot.seq]
+        if self.legacy_path:
+            paths.append(self.legacy_path)
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @contextmanager
+    def remote(self):
+        """Journal the changes made inside the block without making them undoable
+
+        Used for changes that came from another device: undo and redo only ever
+        revert what was done on this one.
+        """
+        self.flush()
+        self._mode = 'remote'
+        try:
+            yield
+        finally:
+            self._mode = None
+
+    def undo(self):
+        """Revert the latest recorded event and return it, or None if there is nothing to undo"""
+        self.flush()
+        if not self.undo_stack:
+            return None
+        event = self.undo_stack.pop()
+        self._mode = 'undo'
+        try:
+            self.ledger.apply(Ledger.inverse(event))
+        finally:
+            self._mode = None
+        self.redo_stack.append(event)
+        return event
+
+    def redo(self):
+        """Re-apply the latest undone event and return it, or None if there is nothing to redo"""
+        self.flush()
+        if not self.redo_stack:
+            return None
+        event = self.redo_stack.pop()
+        self._mode = 'redo'
+        try:
+            self.ledger.apply(event)
+        finally:
+            self._mode = None
+        return event
+
+    def close(self):
+        self.flush()
+        self._close_segment()
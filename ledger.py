@@ -0,0 +1,210 @@
+import time
+from datetime import datetime
+
+
+def parse_amount(value):
+    """Convert a TextInput string (or saved value) to an int, treating blanks and junk as 0"""
+    if isinstance(value, int):
+        return value
+    try:
+        return int(value) if value else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+class Player:
+    """Compact record for one player's game state"""
+    __slots__ = ('name', 'total_buy', 'chips', 'debt')
+
+    def __init__(self, name, total_buy=0, chips=0, debt=0):
+        self.name = name
+        self.total_buy = total_buy
+        self.chips = chips
+        self.debt = debt
+
+    @property
+    def sum(self):
+        return self.chips - self.debt
+
+    @property
+    def net(self):
+        """Result of the game: chips left minus everything bought in"""
+        return self.chips - self.total_buy
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'total_buy': self.total_buy,
+            'debt': self.debt,
+            'chips': self.chips
+        }
+
+
+class Ledger:
+    """Headless game state with running totals kept up to date on every mutation
+
+    Every mutation is announced to the callables in listeners as an event tuple
+    whose first item names its type (time is in epoch seconds):
+
+        ('add_player', name)          ('remove_player', name)
+        ('buy', index, amount, time)  ('set_comments', old, new)
+        ('set_chips', index, old, new)
+        ('set_debt', index, old, new)
+    """
+
+    def __init__(self, date=None, comments=""):
+        self.date = date or datetime.now().strftime("%Y-%m-%d")
+        self.comments = comments
+        self.players = []
+        self.total_buy = 0
+        self.total_chips = 0
+        self.total_debt = 0
+        self.buy_ins = []  # (player index, amount, time) for every buy-in, corrections included
+        self.listeners = []
+
+    def __len__(self):
+        return len(self.players)
+
+    def _emit(self, event):
+        for listener in self.listeners:
+            listener(event)
+
+    def add_player(self, name, total_buy=0, chips=0, debt=0):
+        player = Player(name, total_buy, chips, debt)
+        self.players.append(player)
+        self.total_buy += total_buy
+        self.total_chips += chips
+        self.total_debt += debt
+        self._emit(('add_player', name))
+        return player
+
+    def remove_player(self):
+        """Remove the most recently added player (the inverse of add_player)"""
+        player = self.players.pop()
+        self.total_buy -= player.total_buy
+        self.total_chips -= player.chips
+        self.total_debt -= player.debt
+        self._emit(('remove_player', player.name))
+        return player
+
+    def buy(self, index, amount, when=None):
+        """Add a buy-in for the player at index and return their new total"""
+        when = int(time.time()) if when is None else when
+        player = self.players[index]
+        player.total_buy += amount
+        self.total_buy += amount
+        self.buy_ins.append((index, amount, when))
+        self._emit(('buy', index, amount, when))
+        return player.total_buy
+
+    def set_chips(self, index, chips):
+        player = self.players[index]
+        old = player.chips
+        if chips != old:
+            self.total_chips += chips - old
+            player.chips = chips
+            self._emit(('set_chips', index, old, chips))
+
+    def set_debt(self, index, debt):
+        player = self.players[index]
+        old = player.debt
+        if debt != old:
+            self.total_debt += debt - old
+            player.debt = debt
+            self._emit(('set_debt', index, old, debt))
+
+    def set_comments(self, comments):
+        old = self.comments
+        if comments != old:
+            self.comments = comments
+            self._emit(('set_comments', old, comments))
+
+    def apply(self, event):
+        """Perform the mutation an event describes, e.g. when replaying a journal"""
+        kind = event[0]
+        if kind == 'add_player':
+            self.add_player(event[1])
+        elif kind == 'remove_player':
+            self.remove_player()
+        elif kind == 'buy':
+            self.buy(event[1], event[2], event[3] if len(event) > 3 else None)
+        elif kind == 'set_chips':
+            self.set_chips(event[1], event[3])
+        elif kind == 'set_debt':
+            self.set_debt(event[1], event[3])
+        elif kind == 'set_comments':
+            self.set_comments(event[2])
+        else:
+            raise ValueError(f"Unknown ledger event: {kind}")
+
+    @staticmethod
+    def inverse(event):
+        """Get the event that undoes event"""
+        kind = event[0]
+        if kind == 'add_player':
+            return ('remove_player', event[1])
+        if kind == 'remove_player':
+            return ('add_player', event[1])
+        if kind == 'buy':
+            return ('buy', event[1], -event[2])
+        if kind in ('set_chips', 'set_debt'):
+            return (kind, event[1], event[3], event[2])
+        if kind == 'set_comments':
+            return (kind, event[2], event[1])
+        raise ValueError(f"Unknown ledger event: {kind}")
+
+    def describe(self, event):
+        """Short human-readable description of an event for the log"""
+        kind = event[0]
+        if kind == 'add_player':
+            return f"add player {event[1].capitalize()}"
+        if kind == 'remove_player':
+            return f"remove player {event[1].capitalize()}"
+        if kind == 'set_comments':
+            return "comments edit"
+        name = self.players[event[1]].name.capitalize() if event[1] < len(self.players) else f"#{event[1] + 1}"
+        if kind == 'buy':
+            return f"{name} buy-in of {event[2]}"
+        return f"{name} {kind[4:]} {event[2]} -> {event[3]}"
+
+    def event_player(self, event):
+        """Name of the player an event concerns, or None"""
+        kind = event[0]
+        if kind in ('add_player', 'remove_player'):
+            return event[1]
+        if kind != 'set_comments' and event[1] < len(self.players):
+            return self.players[event[1]].name
+        return None
+
+    def to_dict(self):
+        """Get game data for saving"""
+        return {
+            'date': self.date,
+            'comments': self.comments,
+            'players': [player.to_dict() for player in self.players],
+            'total_buy': self.total_buy,
+            'total_chips': self.total_chips,
+            'buy_ins': [list(buy_in) for buy_in in self.buy_ins]
+        }
+
+    @classmethod
+    def from_rows(cls, date, comments, rows, buy_ins=()):
+        """Build a ledger from (name, total_buy, chips, debt) rows, deriving the totals from them"""
+        ledger = cls(date, comments)
+        ledger.players = [Player(*row) for row in rows]
+        ledger.total_buy = sum(player.total_buy for player in ledger.players)
+        ledger.total_chips = sum(player.chips for player in ledger.players)
+        ledger.total_debt = sum(player.debt for player in ledger.players)
+        ledger.buy_ins = [tuple(buy_in) for buy_in in buy_ins]
+        return ledger
+
+    @classmethod
+    def from_dict(cls, game_data):
+        """Build a ledger from saved game data, ignoring any saved totals"""
+        return cls.from_rows(game_data.get('date'), game_data.get('comments', ""),
+                             [(player_data['name'],
+                               parse_amount(player_data.get('total_buy', 0)),
+                               parse_amount(player_data.get('chips', 0)),
+                               parse_amount(player_data.get('debt', 0)))
+                              for player_data in game_data.get('players', [])],
+                             game_data.get('buy_ins', []))
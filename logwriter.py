@@ -0,0 +1,412 @@
+import bisect
+import gzip
+import os
+import threading
+import time
+import zlib
+
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    compressed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    segment INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    PRIMARY KEY (segment, start)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS entries (
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    player TEXT COLLATE NOCASE
+);
+CREATE INDEX IF NOT EXISTS idx_entries_player ON entries(player, time);
+CREATE INDEX IF NOT EXISTS idx_entries_time ON entries(time);
+CREATE INDEX IF NOT EXISTS idx_entries_segment ON entries(segment, offset);
+"""
+
+
+class LogWriter:
+    """Append-only log file kept open, with entries batched in memory and flushed on a background thread
+
+    The file at path is the active segment. It is rotated when it grows past
+    max_bytes or a new session starts: the old segment is renamed, then gzipped
+    on the background thread in BLOCK_SIZE blocks, each its own gzip member, and
+    only the newest keep archives are kept. A SQLite index beside the log maps
+    every entry's time and player to its segment and byte offset, so find() can
+    seek straight to the matching lines. The index is opened on the background
+    thread, keeping SQLite off the startup path; a call that needs it before
+    then waits for it.
+    """
+
+    BLOCK_SIZE = 64 * 1024
+    # Index entries deleted per transaction when pruning, so the lock is never held for long
+    PRUNE_BATCH = 2000
+
+    def __init__(self, path, flush_interval=1.0, max_pending=64, max_bytes=1024 * 1024, keep=100):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self._root, self._ext = os.path.splitext(path)
+        self._file = None
+        self._pending = []
+        self._lock = threading.Lock()  # guards _pending, held only briefly
+        self._io_lock = threading.Lock()  # serializes file and index access so batches stay in order
+        self._wake = threading.Event()
+        self._closed = False
+        self.generation = 0  # bumped when a new session starts so readers know to start over
+        self._to_compress = []
+        self._db = None
+        self.segment = None  # id of the active segment, known once the index is open
+        self.session_segment = None  # id of the segment the current session started in
+        self._size = os.path.getsize(path) if os.path.exists(path) else 0
+        self._thread = threading.Thread(target=self._run, name='LogWriter', daemon=True)
+        self._thread.start()
+
+    def _open_index(self):
+        """Open the index if it isn't yet; the caller holds _io_lock"""
+        if self._db is not None:
+            return
+        import sqlite3
+        self._db = sqlite3.connect(self._root + '.index.db', check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(INDEX_SCHEMA)
+        row = self._db.execute("SELECT id FROM segments WHERE path = ? ORDER BY id DESC LIMIT 1",
+                               (self.path,)).fetchone()
+        with self._db:
+            self.segment = row[0] if row else self._new_segment()
+        self.session_segment = self.segment
+        # Archives a previous run didn't get to compress
+        self._to_compress = [segment for (segment,) in self._db.execute(
+            "SELECT id FROM segments WHERE compressed = 0 AND path != ? ORDER BY id", (self.path,))]
+
+    def session_start(self):
+        """Id of the segment the current session started in"""
+        with self._io_lock:
+            self._open_index()
+            return self.session_segment
+
+    def _new_segment(self):
+        return self._db.execute("INSERT INTO segments (path) VALUES (?)", (self.path,)).lastrowid
+
+    def begin(self, header=""):
+        """Continue the active segment, starting it with header if it is empty"""
+        with self._io_lock:
+            if self._size == 0:
+                self._write_header(header)
+
+    def rotate(self, header=""):
+        """Start a new session: archive the active segment and begin a fresh one with header"""
+        with self._io_lock:
+            self._open_index()
+            with self._lock:
+                batch, self._pending = self._pending, []
+            self._write_batch(batch)
+            self.generation += 1
+            self._rotate_locked(header)
+            self.session_segment = self.segment
+
+    def _write_header(self, header):
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'ab')
+            data = header.encode('utf-8')
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+        except Exception as e:
+            self._file = None
+            print(f"Error writing log header: {e}")
+
+    def _rotate_locked(self, header):
+        """Archive the active segment and open a new one; the caller holds _io_lock"""
+        if self._file:
+            self._file.close()
+            self._file = None
+        if self._size:
+            archived = f"{self._root}.{self.segment:06d}{self._ext}"
+            try:
+                os.replace(self.path, archived)
+                with self._db:
+                    self._db.execute("UPDATE segments SET path = ? WHERE id = ?", (archived, self.segment))
+                    self._to_compress.append(self.segment)
+                    self.segment = self._new_segment()
+                self._size = 0
+                self._wake.set()
+            except Exception as e:
+                print(f"Error rotating log file: {e}")
+        self._write_header(header)
+
+    def write(self, entry, when=None, player=None):
+        """Queue an entry; never touches the disk on the calling thread
+
+        when is the entry's epoch time (now by default) and player a name, or a
+        tuple of names, the entry is about; both go into the index.
+        """
+        with self._lock:
+            self._pending.append((entry, when, player))
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Write all queued entries to the file and the index"""
+        with self._io_lock:
+            self._open_index()
+            with self._lock:
+                batch, self._pending = self._pending, []
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        if not batch:
+            return
+        now = time.time()
+        chunks = []
+        rows = []
+        offset = self._size
+        for entry, when, player in batch:
+            data = entry.encode('utf-8')
+            when = int(now if when is None else when)
+            names = (player,) if player is None or isinstance(player, str) else player
+            rows.extend((self.segment, offset, when, name) for name in names)
+            chunks.append(data)
+            offset += len(data)
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'ab')
+            self._file.write(b"".join(chunks))
+            self._file.flush()
+            self._size = offset
+            with self._db:
+                self._db.executemany("INSERT INTO entries (segment, offset, time, player) VALUES (?, ?, ?, ?)", rows)
+        except Exception as e:
+            print(f"Error writing log file: {e}")
+        if self._size >= self.max_bytes:
+            self._rotate_locked("")
+
+    def read_segment(self, segment, offset):
+        """Return (bytes of segment from offset, id of the active segment)"""
+        with self._io_lock:
+            self._open_index()
+            if segment == self.segment:
+                path, compressed = self.path, False
+            else:
+                row = self._db.execute("SELECT path, compressed FROM segments WHERE id = ?", (segment,)).fetchone()
+                if row is None:
+                    return b"", self.segment  # pruned
+                path, compressed = row
+            with (gzip.open(path, 'rb') if compressed else open(path, 'rb')) as f:
+                f.seek(offset)
+                return f.read(), self.segment
+
+    def find(self, player=None, start=None, end=None, limit=500):
+        """Return [(epoch second, line)] of the latest limit entries about player and/or in [start, end), oldest first
+
+        Only the matching lines are read: plain segments by seeking to each
+        offset, archives by decompressing just the blocks that hold them.
+        """
+        self.flush()
+        clauses = []
+        params = []
+        if player:
+            clauses.append("player = ?")
+            params.append(player)
+        if start is not None:
+            clauses.append("time >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("time < ?")
+            params.append(end)
+        where = " AND ".join(clauses) or "1"
+        with self._io_lock:
+            rows = self._db.execute(
+                f"SELECT DISTINCT segment, offset, time FROM entries WHERE {where} "
+                f"ORDER BY time DESC, segment DESC, offset DESC LIMIT ?", (*params, limit)).fetchall()
+            rows.reverse()
+            # Read under the lock so compression can't swap a segment's file mid-read
+            lines = self._read_lines(rows)
+        return [(when, lines[segment, offset]) for segment, offset, when in rows if (segment, offset) in lines]
+
+    def _read_lines(self, rows):
+        wanted = {}
+        for segment, offset, _ in rows:
+            wanted.setdefault(segment, []).append(offset)
+        lines = {}
+        for segment, offsets in wanted.items():
+            row = self._db.execute("SELECT path, compressed FROM segments WHERE id = ?", (segment,)).fetchone()
+            if row is None:
+                continue
+            path, compressed = row
+            try:
+                with open(path, 'rb') as f:
+                    if compressed:
+                        self._read_compressed(f, segment, offsets, lines)
+                    else:
+                        for offset in offsets:
+                            f.seek(offset)
+                            lines[segment, offset] = f.readline().decode('utf-8', 'replace').rstrip("\n")
+            except OSError as e:
+                print(f"Error reading log segment: {e}")
+        return lines
+
+    def _read_compressed(self, f, segment, offsets, lines):
+        blocks = self._db.execute("SELECT start, offset FROM blocks WHERE segment = ? ORDER BY start",
+                                  (segment,)).fetchall()
+        starts = [start for start, _ in blocks]
+        cache = {}
+        for offset in offsets:
+            i = bisect.bisect_right(starts, offset) - 1
+            if i < 0:
+                continue
+            if i not in cache:
+                f.seek(blocks[i][1])
+                size = blocks[i + 1][1] - blocks[i][1] if i + 1 < len(blocks) else -1
+                cache[i] = zlib.decompress(f.read(size), 31)
+            data = cache[i]
+            begin = offset - starts[i]
+            newline = data.find(b"\n", begin)
+            lines[segment, offset] = data[begin:newline if newline >= 0 else len(data)].decode('utf-8', 'replace')
+
+    def _compress(self, segment):
+        """Gzip an archived segment block by block and record where each block starts"""
+        with self._io_lock:
+            self._open_index()
+            row = self._db.execute("SELECT path, compressed FROM segments WHERE id = ?", (segment,)).fetchone()
+        if row is None or row[1]:
+            return
+        plain = row[0]
+        gz_path = plain + '.gz'
+        blocks = []
+        try:
+            with open(plain, 'rb') as src, open(gz_path + '.tmp', 'wb') as dst:
+                start = 0
+                while True:
+                    block = src.read(self.BLOCK_SIZE)
+                    if not block:
+                        break
+                    block += src.readline()  # end every block on a line boundary
+                    blocks.append((segment, start, dst.tell()))
+                    dst.write(gzip.compress(block))
+                    start += len(block)
+            os.replace(gz_path + '.tmp', gz_path)
+            with self._io_lock:
+                with self._db:
+                    self._db.executemany("INSERT OR REPLACE INTO blocks (segment, start, offset) VALUES (?, ?, ?)",
+                                         blocks)
+                    self._db.execute("UPDATE segments SET path = ?, compressed = 1 WHERE id = ?", (gz_path, segment))
+                os.remove(plain)
+        except Exception as e:
+            print(f"Error compressing log segment: {e}")
+
+    def _prune(self):
+        """Delete the oldest archives beyond keep, with their index entries"""
+        with self._io_lock:
+            self._open_index()
+            old = self._db.execute(
+                "SELECT id, path FROM segments WHERE compressed = 1 ORDER BY id DESC LIMIT -1 OFFSET ?",
+                (self.keep,)).fetchall()
+            if not old:
+                return
+            with self._db:
+                for segment, path in old:
+                    for table, column in (('blocks', 'segment'), ('segments', 'id')):
+                        self._db.execute(f"DELETE FROM {table} WHERE {column} = ?", (segment,))
+            for segment, path in old:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        self._prune_entries()
+
+    def _prune_entries(self):
+        """Delete the index entries of pruned segments a batch at a time
+
+        Segments are always pruned oldest first, so their entries are those
+        below the oldest remaining segment; entries a crash left behind are
+        cleared the same way on the next prune.
+        """
+        while True:
+            with self._io_lock:
+                with self._db:
+                    deleted = self._db.execute(
+                        "DELETE FROM entries WHERE rowid IN (SELECT rowid FROM entries "
+                        "WHERE segment < (SELECT MIN(id) FROM segments) LIMIT ?)", (self.PRUNE_BATCH,)).rowcount
+            if deleted < self.PRUNE_BATCH:
+                return
+
+    def _compress_pending(self):
+        while self._to_compress:
+            self._compress(self._to_compress.pop(0))
+            self._prune()
+
+    def close(self):
+        """Flush remaining entries, finish archiving, stop the background thread and close the file"""
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        self._compress_pending()
+        with self._io_lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _run(self):
+        try:
+            with self._io_lock:
+                self._open_index()
+        except Exception as e:
+            print(f"Error opening log index: {e}")
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            self._compress_pending()
+
+
+class LogTail:
+    """Follows a LogWriter's current session, returning only the lines added since the last read
+
+    Reading starts at the segment the session began in. Lines written just before a size rotation are picked up from the archived
+    segment, so the tail carries on across rotations within a session.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.reset()
+
+    def reset(self):
+        self.segment = None  # the session's first segment, looked up on the next read
+        self.offset = 0
+        self.generation = self.writer.generation
+        self._partial = b""
+
+    def read_new(self):
+        """Return (restarted, lines); restarted is True when a new session started since the last read"""
+        restarted = self.generation != self.writer.generation
+        if restarted:
+            self.reset()
+        if self.segment is None:
+            self.segment = self.writer.session_start()
+        chunks = []
+        while True:
+            chunk, active = self.writer.read_segment(self.segment, self.offset)
+            chunks.append(chunk)
+            self.offset += len(chunk)
+            if self.segment >= active:
+                break
+            self.segment += 1
+            self.offset = 0
+        lines = (self._partial + b"".join(chunks)).split(b"\n")
+        self._partial = lines.pop()  # keep an unterminated last line for next time
+        return restarted, [line.decode('utf-8', 'replace') for line in lines]
@@ -0,0 +1,118 @@
+import csv
+import heapq
+
+
+class _Node:
+    __slots__ = ('children', 'top', 'key')
+
+    def __init__(self):
+        self.children = {}
+        self.top = []  # keys of the best completions, best first
+        self.key = None  # key of the name ending here, if any
+
+
+class NameIndex:
+    """Prefix trie of player names in which every node caches its best completions
+
+    Names are matched ignoring case and ranked by weight (sessions played, say),
+    then alphabetically. Weights only grow, so each node's cached list stays
+    exact as names are added. A lookup that extends the previous one by a
+    character steps one node down from where that lookup ended, so typing costs
+    the same per keystroke however many names are indexed. Only when skipped
+    names leave the cached list short is the rest of the subtree searched.
+    """
+
+    LIMIT = 8
+
+    def __init__(self, limit=LIMIT):
+        self.limit = limit
+        self.root = _Node()
+        self.names = {}  # key -> [display name, weight]
+        self._last = ("", self.root)  # prefix key and node of the previous lookup
+
+    def __len__(self):
+        return len(self.names)
+
+    def _rank(self, key):
+        return -self.names[key][1], key
+
+    def add(self, name, weight=1):
+        """Index name, or add weight to it if it is already indexed"""
+        name = name.strip()
+        key = name.lower()
+        if not key:
+            return
+        entry = self.names.get(key)
+        if entry is None:
+            self.names[key] = [name, weight]
+        else:
+            entry[1] += weight
+        rank = self._rank(key)
+        node = self.root
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+            top = node.top
+            if key in top:
+                top.sort(key=self._rank)
+            elif len(top) < self.limit or rank < self._rank(top[-1]):
+                top.append(key)
+                top.sort(key=self._rank)
+                del top[self.limit:]
+        node.key = key
+
+    def complete(self, prefix, count=None, skip=()):
+        """Return up to count (default limit) of the best indexed names starting with prefix, best first
+
+        Names whose lower-cased key is in skip are left out.
+        """
+        count = self.limit if count is None else count
+        key = prefix.strip().lower()
+        if not key:
+            return []
+        last_key, node = self._last
+        if not key.startswith(last_key):
+            last_key, node = "", self.root
+        for char in key[len(last_key):]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        self._last = (key, node)
+        keys = [name_key for name_key in node.top if name_key not in skip]
+        if len(keys) < count and len(node.top) == self.limit:
+            # A full cache may hold only some of the names here; look through all of them
+            keys = heapq.nsmallest(count, self._keys_under(node, skip), key=self._rank)
+        return [self.names[name_key][0] for name_key in keys[:count]]
+
+    def _keys_under(self, node, skip):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.key is not None and node.key not in skip:
+                yield node.key
+            stack.extend(node.children.values())
+
+
+def read_roster(lines):
+    """Yield the player names in a roster, read row by row from an iterable of lines
+
+    A roster is a plain list with one name per line, or CSV; if the first row
+    has a 'name' column, names are taken from it, otherwise from each row's
+    first non-empty cell. Blank rows and repeated names are skipped.
+    """
+    column = None
+    seen = set()
+    for number, row in enumerate(csv.reader(lines)):
+        cells = [cell.strip() for cell in row]
+        if number == 0:
+            header = [cell.lower() for cell in cells]
+            if 'name' in header:
+                column = header.index('name')
+                continue
+        if column is not None:
+            name = cells[column] if column < len(cells) else ""
+        else:
+            name = next((cell for cell in cells if cell), "")
+        key = name.lower()
+        if key and key not in seen:
+            seen.add(key)
+            yield name
@@ -0,0 +1,182 @@
+import functools
+import json
+import os
+import time
+from collections import deque
+
+from savestate import write_atomic
+
+
+class StartupTimer:
+    """Marks the phases of a cold start, in milliseconds since this module was imported"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []  # (name, ms since start) in the order reached
+        self.first_frame_ms = None
+
+    def mark(self, phase):
+        if self.first_frame_ms is not None:
+            return  # only the cold start is timed
+        self.phases.append((phase, (time.perf_counter() - self.start) * 1000))
+
+    def first_frame(self):
+        """Record that the first frame is on screen; return False if it already was"""
+        if self.first_frame_ms is not None:
+            return False
+        self.first_frame_ms = (time.perf_counter() - self.start) * 1000
+        return True
+
+    def durations(self):
+        """Return [(phase, ms spent in it)], ending with the wait for the first frame if it has been seen"""
+        marks = list(self.phases)
+        if self.first_frame_ms is not None:
+            marks.append(('first frame', self.first_frame_ms))
+        result = []
+        previous = 0.0
+        for name, at in marks:
+            result.append((name, at - previous))
+            previous = at
+        return result
+
+    def summary(self):
+        text = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.durations())
+        if self.first_frame_ms is not None:
+            text += f" (time to first frame {self.first_frame_ms:.0f} ms)"
+        return text
+
+    def report(self):
+        return {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'phases': {name: round(ms, 3) for name, ms in self.durations()},
+            'first_frame_ms': None if self.first_frame_ms is None else round(self.first_frame_ms, 3),
+        }
+
+    def append_to(self, path):
+        """Add this launch's report as one JSON line so startup can be tracked across launches"""
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.report()) + "\n")
+
+
+def current_rss_kib():
+    """Resident memory of this process in KiB, or None where it can't be read"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # peak, not current, on this fallback
+    except ImportError:
+        return None
+
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, min(len(sorted_samples) - 1, int(round(fraction * len(sorted_samples))) - 1))
+    return sorted_samples[rank]
+
+
+class Instrumentation:
+    """Runtime-switchable timings, counters and memory samples
+
+    Each timed operation keeps its latest SAMPLES durations in a ring buffer, so
+    the memory used stays bounded however long the app runs. While disabled, a
+    timed call costs one attribute check and counters return immediately.
+    """
+
+    SAMPLES = 512
+    # Upper edges of the histogram buckets, in milliseconds
+    BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000, float('inf'))
+
+    def __init__(self, samples=SAMPLES):
+        self.enabled = False
+        self.samples = samples
+        self.reset()
+
+    def reset(self):
+        self.timings = {}  # name -> deque of durations in ms, newest last
+        self.calls = {}  # name -> calls timed since the last reset, not capped by the ring
+        self.counters = {}  # name -> events counted
+        self.memory = deque(maxlen=self.samples)  # resident KiB
+
+    def timed(self, fn):
+        """Decorator recording how long each call of fn takes while enabled"""
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(name, (time.perf_counter() - start) * 1000)
+        return wrapper
+
+    def record(self, name, ms):
+        ring = self.timings.get(name)
+        if ring is None:
+            ring = self.timings[name] = deque(maxlen=self.samples)
+        ring.append(ms)
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def sample_memory(self):
+        kib = current_rss_kib()
+        if kib is not None:
+            self.memory.append(kib)
+
+    def histogram(self, name):
+        """Return [(bucket upper edge in ms, samples in it)] for a timed operation"""
+        counts = [0] * len(self.BUCKETS_MS)
+        for ms in self.timings.get(name, ()):
+            for i, edge in enumerate(self.BUCKETS_MS):
+                if ms <= edge:
+                    counts[i] += 1
+                    break
+        return list(zip(self.BUCKETS_MS, counts))
+
+    def summary(self):
+        """Everything collected, as plain data"""
+        timings = {}
+        for name, ring in sorted(self.timings.items()):
+            samples = sorted(ring)
+            timings[name] = {
+                'calls': self.calls[name],
+                'samples': len(samples),
+                'mean_ms': sum(samples) / len(samples),
+                'p50_ms': percentile(samples, 0.50),
+                'p90_ms': percentile(samples, 0.90),
+                'p99_ms': percentile(samples, 0.99),
+                'max_ms': samples[-1],
+                'histogram': [[None if edge == float('inf') else edge, count]
+                              for edge, count in self.histogram(name) if count],
+            }
+        return {
+            'timings': timings,
+            'counters': dict(sorted(self.counters.items())),
+            'memory_kib': {
+                'latest': self.memory[-1] if self.memory else None,
+                'min': min(self.memory, default=None),
+                'max': max(self.memory, default=None),
+            },
+        }
+
+    def export(self, path):
+        """Write the summary and the startup timings to path as JSON"""
+        report = {'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"), 'startup': startup.report()}
+        report.update(self.summary())
+        write_atomic(path, json.dumps(report, indent=2))
+
+
+# Created at import so the clock covers everything imported after this module
+startup = StartupTimer()
+instrumentation = Instrumentation()
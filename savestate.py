@@ -0,0 +1,75 @@
+import json
+import os
+import threading
+
+
+def write_atomic(path, content):
+    """Write text or bytes to a temp file next to path and swap it in, so a crash never leaves a partial save"""
+    tmp_path = path + '.tmp'
+    binary = isinstance(content, bytes)
+    with open(tmp_path, 'wb' if binary else 'w', encoding=None if binary else 'utf-8') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SaveWorker:
+    """Serializes and writes game snapshots on a background thread; only the newest pending snapshot is written
+
+    encode turns a submitted snapshot into the text or bytes to write; by
+    default snapshots are game data dicts written as JSON.
+    """
+
+    def __init__(self, path, encode=None):
+        self.path = path
+        self.encode = encode or (lambda game_data: json.dumps(game_data, indent=2))
+        self._pending = None
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='SaveWorker', daemon=True)
+        self._thread.start()
+
+    def submit(self, game_data, on_saved=None):
+        """Queue a snapshot, replacing any that hasn't been written yet
+
+        on_saved is called on the worker thread once this snapshot is on disk.
+        """
+        with self._cond:
+            self._pending = (game_data, on_saved)
+            self._cond.notify_all()
+
+    def flush(self):
+        """Block until every submitted snapshot is on disk"""
+        with self._cond:
+            while self._pending is not None or self._busy:
+                self._cond.wait()
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                (game_data, on_saved), self._pending = self._pending, None
+                self._busy = True
+            try:
+                write_atomic(self.path, self.encode(game_data))
+                print(f"Game data saved to {self.path}")
+                if on_saved:
+                    on_saved(game_data)
+            except Exception as e:
+                print(f"Error saving game data: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
@@ -0,0 +1,119 @@
+import heapq
+
+
+# Tables with at most this many non-zero balances are settled exactly
+EXACT_LIMIT = 10
+
+# Name used for the counter-party that absorbs chips missing from (or extra on) the table
+UNACCOUNTED = "(unaccounted)"
+
+# Name used for the cash paid into the game, which is handed back out at settlement
+POT = "(pot)"
+
+
+def balances_from_ledger(ledger):
+    """Get (name, balance) for every player, and for the pot, from total_buy, chips and debt
+
+    Debt is the part of a player's buy-ins not paid in cash, so the pot holds
+    total_buy - debt from each of them. Players are settled against it: each
+    player's balance is chips - debt (the Sum the app shows), what they collect
+    or, if negative, still owe, and the pot pays out the cash it holds. If
+    every buy-in was on credit the pot is empty and each balance is chips
+    minus total_buy.
+    """
+    balances = [(player.name, player.sum) for player in ledger.players]
+    pot = ledger.total_buy - ledger.total_debt
+    if pot:
+        balances.append((POT, -pot))
+    return balances
+
+
+def _greedy(creditors, debtors, transfers):
+    """Settle heaps of (-amount, order, name) by always matching the largest debtor with the largest creditor"""
+    while creditors and debtors:
+        credit, c_order, c_name = heapq.heappop(creditors)
+        debit, d_order, d_name = heapq.heappop(debtors)
+        amount = min(-credit, -debit)
+        transfers.append((d_name, c_name, amount))
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, c_order, c_name))
+        elif -debit > amount:
+            heapq.heappush(debtors, (debit + amount, d_order, d_name))
+
+
+def _settle_greedy(entries):
+    """Heap-based settlement of (name, balance) entries in O(n log n)"""
+    transfers = []
+    # Pair up exact opposites first; each such pair needs just one transfer
+    waiting = {}
+    rest = []
+    for name, balance in entries:
+        partners = waiting.get(-balance)
+        if partners:
+            other = partners.pop()
+            payer, payee = (name, other) if balance < 0 else (other, name)
+            transfers.append((payer, payee, abs(balance)))
+        else:
+            waiting.setdefault(balance, []).append(name)
+    for balance, names in waiting.items():
+        rest.extend((name, balance) for name in names)
+
+    creditors = [(-balance, order, name) for order, (name, balance) in enumerate(rest) if balance > 0]
+    debtors = [(balance, order, name) for order, (name, balance) in enumerate(rest) if balance < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+    _greedy(creditors, debtors, transfers)
+    return transfers
+
+
+def _settle_exact(entries):
+    """Minimum number of transfers: split into as many zero-sum groups as possible, then settle each group"""
+    count = len(entries)
+    full = (1 << count) - 1
+    sums = [0] * (full + 1)
+    groups = [0] * (full + 1)
+    for mask in range(1, full + 1):
+        low = mask & -mask
+        sums[mask] = sums[mask ^ low] + entries[low.bit_length() - 1][1]
+        best = 0
+        bits = mask
+        while bits:
+            bit = bits & -bits
+            best = max(best, groups[mask ^ bit])
+            bits ^= bit
+        groups[mask] = best + (sums[mask] == 0)
+
+    # Walk back from the full set, cutting a group at every zero-sum prefix
+    transfers = []
+    mask = full
+    group = []
+    while mask:
+        target = groups[mask] - (sums[mask] == 0)
+        bits = mask
+        while bits:
+            bit = bits & -bits
+            if groups[mask ^ bit] == target:
+                break
+            bits ^= bit
+        group.append(entries[bit.bit_length() - 1])
+        mask ^= bit
+        if sums[mask] == 0:
+            transfers.extend(_settle_greedy(group))
+            group = []
+    return transfers
+
+
+def settle(balances):
+    """Turn (name, balance) pairs into a short list of (payer, payee, amount) transfers
+
+    Balances should sum to zero; any difference is settled against UNACCOUNTED.
+    Small tables get the exact minimum number of transfers, larger ones a greedy
+    matching that needs at most one transfer less than the number of players.
+    """
+    entries = [(name, balance) for name, balance in balances if balance]
+    total = sum(balance for _, balance in entries)
+    if total:
+        entries.append((UNACCOUNTED, -total))
+    if len(entries) <= EXACT_LIMIT:
+        return _settle_exact(entries)
+    return _settle_greedy(entries)
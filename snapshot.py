@@ -0,0 +1,139 @@
+import json
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+
+from ledger import Ledger
+
+
+# File layout, all little-endian:
+#   header      HEADER (magic, version, flags, journal seq, player count, buy-in count)
+#   date        u16 byte length + UTF-8
+#   comments    u32 byte length + UTF-8
+#   names       player count x u16 byte lengths, then the names' UTF-8 bytes back to back
+#   players     total_buy, chips and debt columns, player count x i64 each
+#   buy-ins     index, amount and time columns, buy-in count x i64 each
+#   trailer     u32 CRC-32 of everything before it
+MAGIC = b'TAKISNAP'
+VERSION = 1
+HEADER = struct.Struct('<8sHHqII')
+TRAILER = struct.Struct('<I')
+NO_TIME = -1  # stored for a buy-in without a time
+
+_SWAP = sys.byteorder != 'little'
+
+
+class Snapshot:
+    """Column copy of a ledger taken on the main thread, to be encoded on the save worker"""
+    __slots__ = ('seq', 'date', 'comments', 'names', 'total_buy', 'chips', 'debt', 'buy_ins')
+
+    def __init__(self, ledger, seq):
+        players = ledger.players
+        self.seq = seq
+        self.date = ledger.date
+        self.comments = ledger.comments
+        self.names = [player.name for player in players]
+        self.total_buy = array('q', [player.total_buy for player in players])
+        self.chips = array('q', [player.chips for player in players])
+        self.debt = array('q', [player.debt for player in players])
+        self.buy_ins = list(ledger.buy_ins)
+
+
+def _column_bytes(values):
+    column = values if isinstance(values, array) else array('q', values)
+    if _SWAP:
+        column = array('q', column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def encode(snapshot):
+    """Serialize a Snapshot into the binary format"""
+    date = snapshot.date.encode('utf-8')
+    comments = snapshot.comments.encode('utf-8')
+    names = [name.encode('utf-8') for name in snapshot.names]
+    buy_ins = snapshot.buy_ins
+    name_lengths = array('H', [len(name) for name in names])
+    if _SWAP:
+        name_lengths.byteswap()
+    parts = [
+        HEADER.pack(MAGIC, VERSION, 0, snapshot.seq, len(names), len(buy_ins)),
+        struct.pack('<H', len(date)), date,
+        struct.pack('<I', len(comments)), comments,
+        name_lengths.tobytes(), b''.join(names),
+        _column_bytes(snapshot.total_buy), _column_bytes(snapshot.chips), _column_bytes(snapshot.debt),
+        _column_bytes([index for index, _, _ in buy_ins]),
+        _column_bytes([amount for _, amount, _ in buy_ins]),
+        _column_bytes([NO_TIME if when is None else when for _, _, when in buy_ins]),
+    ]
+    body = b''.join(parts)
+    return body + TRAILER.pack(zlib.crc32(body))
+
+
+def _read_column(view, offset, count, typecode='q'):
+    column = array(typecode)
+    end = offset + count * column.itemsize
+    column.frombytes(view[offset:end])
+    if _SWAP:
+        column.byteswap()
+    return column, end
+
+
+def decode(view):
+    """Parse the binary format from a buffer and return (ledger, journal seq); totals are recomputed"""
+    if len(view) < HEADER.size + TRAILER.size:
+        raise ValueError("Snapshot is truncated")
+    (checksum,) = TRAILER.unpack_from(view, len(view) - TRAILER.size)
+    if zlib.crc32(view[:len(view) - TRAILER.size]) != checksum:
+        raise ValueError("Snapshot checksum mismatch")
+    magic, version, _, seq, player_count, buy_in_count = HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a game snapshot")
+    if version > VERSION:
+        raise ValueError(f"Snapshot version {version} is newer than this app supports")
+
+    offset = HEADER.size
+    (length,) = struct.unpack_from('<H', view, offset)
+    offset += 2
+    date = str(view[offset:offset + length], 'utf-8')
+    offset += length
+    (length,) = struct.unpack_from('<I', view, offset)
+    offset += 4
+    comments = str(view[offset:offset + length], 'utf-8')
+    offset += length
+
+    name_lengths, offset = _read_column(view, offset, player_count, 'H')
+    names = []
+    for length in name_lengths:
+        names.append(str(view[offset:offset + length], 'utf-8'))
+        offset += length
+    total_buy, offset = _read_column(view, offset, player_count)
+    chips, offset = _read_column(view, offset, player_count)
+    debt, offset = _read_column(view, offset, player_count)
+    indexes, offset = _read_column(view, offset, buy_in_count)
+    amounts, offset = _read_column(view, offset, buy_in_count)
+    times, offset = _read_column(view, offset, buy_in_count)
+
+    buy_ins = [(index, amount, None if when == NO_TIME else when)
+               for index, amount, when in zip(indexes, amounts, times)]
+    return Ledger.from_rows(date, comments, zip(names, total_buy, chips, debt), buy_ins), seq
+
+
+def load(path):
+    """Read a binary snapshot through a memory map"""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                return decode(view)
+            finally:
+                view.release()
+
+
+def load_json(path):
+    """Read a snapshot in the older JSON format and return (ledger, journal seq)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        game_data = json.load(f)
+    return Ledger.from_dict(game_data), game_data.get('seq', 0)
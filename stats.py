@@ -0,0 +1,184 @@
+import os
+
+import numpy as np
+
+
+class PlayerStats:
+    """Per-player aggregates over the archived sessions in a HistoryDB
+
+    All per-player state is held in NumPy arrays indexed by player, and each
+    update() folds in only the sessions archived since the previous one, in a
+    few vectorized passes over the new rows. The arrays are cached in an .npz
+    file so the work carries over between launches.
+    """
+
+    ROLLING_WINDOW = 5
+    ARRAYS = ('sessions', 'total_buy', 'net', 'net_sq', 'wins', 'streak', 'best_streak', 'worst_streak', 'recent')
+
+    def __init__(self, history, cache_path=None):
+        self.history = history
+        self.cache_path = cache_path
+        self._reset()
+        if cache_path and os.path.exists(cache_path):
+            try:
+                self._load_cache()
+            except Exception as e:
+                print(f"Error loading stats cache: {e}")
+                self._reset()
+
+    def _reset(self):
+        self.last_session_id = 0
+        self.names = []
+        self._index = {}
+        self.sessions = np.zeros(0, dtype=np.int64)
+        self.total_buy = np.zeros(0, dtype=np.int64)
+        self.net = np.zeros(0, dtype=np.int64)
+        self.net_sq = np.zeros(0, dtype=np.float64)
+        self.wins = np.zeros(0, dtype=np.int64)
+        self.streak = np.zeros(0, dtype=np.int64)  # current run: +n wins or -n losses
+        self.best_streak = np.zeros(0, dtype=np.int64)
+        self.worst_streak = np.zeros(0, dtype=np.int64)
+        self.recent = np.full((0, self.ROLLING_WINDOW), np.nan)  # last nets, oldest first
+
+    def _load_cache(self):
+        with np.load(self.cache_path) as cache:
+            self.last_session_id = int(cache['last_session_id'])
+            self.names = [str(name) for name in cache['names']]
+            for name in self.ARRAYS:
+                setattr(self, name, cache[name])
+        self._index = {name.lower(): i for i, name in enumerate(self.names)}
+
+    def _save_cache(self):
+        tmp_path = self.cache_path + '.tmp.npz'
+        np.savez(tmp_path, last_session_id=self.last_session_id, names=np.array(self.names, dtype=str),
+                 **{name: getattr(self, name) for name in self.ARRAYS})
+        os.replace(tmp_path, self.cache_path)
+
+    def _grow(self, count):
+        """Make room for players seen for the first time"""
+        for name in self.ARRAYS:
+            array = getattr(self, name)
+            fill = np.nan if name == 'recent' else 0
+            extra = np.full((count,) + array.shape[1:], fill, dtype=array.dtype)
+            setattr(self, name, np.concatenate([array, extra]))
+
+    def update(self):
+        """Fold in sessions archived since the last update; return True if anything changed"""
+        conn = self.history.connect()
+        try:
+            if self.last_session_id:
+                latest = conn.execute("SELECT MAX(id) FROM sessions").fetchone()[0] or 0
+                if latest < self.last_session_id:
+                    self._reset()  # the history was replaced, start over
+            rows = conn.execute(
+                "SELECT session_id, name, total_buy, net FROM players WHERE session_id > ? ORDER BY session_id, seat",
+                (self.last_session_id,)).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return False
+
+        session_ids, names, buys, nets = zip(*rows)
+        keys, inverse = np.unique(np.array([name.lower() for name in names]), return_inverse=True)
+        first_name = {}
+        for name in names:
+            first_name.setdefault(name.lower(), name)
+        new_names = [key for key in keys if key not in self._index]
+        for key in new_names:
+            self._index[key] = len(self.names)
+            self.names.append(first_name[key])
+        if new_names:
+            self._grow(len(new_names))
+        idx = np.array([self._index[key] for key in keys], dtype=np.int64)[inverse]
+        buys = np.array(buys, dtype=np.int64)
+        nets = np.array(nets, dtype=np.int64)
+
+        np.add.at(self.sessions, idx, 1)
+        np.add.at(self.total_buy, idx, buys)
+        np.add.at(self.net, idx, nets)
+        np.add.at(self.net_sq, idx, nets.astype(np.float64) ** 2)
+        np.add.at(self.wins, idx, nets > 0)
+        self._update_streaks(idx, nets)
+        self._update_recent(idx, nets)
+
+        self.last_session_id = int(max(session_ids))
+        if self.cache_path:
+            try:
+                self._save_cache()
+            except Exception as e:
+                print(f"Error saving stats cache: {e}")
+        return True
+
+    def _update_streaks(self, idx, nets):
+        """Run-length encode each player's win/loss sequence, continuing the cached current streak"""
+        order = np.argsort(idx, kind='stable')  # group by player, keep session order
+        players = idx[order]
+        signs = np.sign(nets[order])
+        starts = np.ones(len(players), dtype=bool)
+        starts[1:] = (players[1:] != players[:-1]) | (signs[1:] != signs[:-1])
+        run_ids = np.cumsum(starts) - 1
+        run_players = players[starts]
+        run_signs = signs[starts]
+        run_lengths = np.bincount(run_ids)
+
+        # A player's first run in this batch extends their current streak if it has the same sign
+        first_runs = np.ones(len(run_players), dtype=bool)
+        first_runs[1:] = run_players[1:] != run_players[:-1]
+        carried = self.streak[run_players]
+        extend = first_runs & (run_signs != 0) & (np.sign(carried) == run_signs)
+        run_lengths = run_lengths + np.where(extend, np.abs(carried), 0)
+
+        signed = run_signs * run_lengths
+        np.maximum.at(self.best_streak, run_players, np.where(run_signs > 0, run_lengths, 0))
+        np.maximum.at(self.worst_streak, run_players, np.where(run_signs < 0, run_lengths, 0))
+        last_runs = np.ones(len(run_players), dtype=bool)
+        last_runs[:-1] = run_players[1:] != run_players[:-1]
+        self.streak[run_players[last_runs]] = signed[last_runs]
+
+    def _update_recent(self, idx, nets):
+        """Shift each player's window of recent nets left by their new sessions and append them"""
+        window = self.ROLLING_WINDOW
+        counts = np.bincount(idx, minlength=len(self.names))
+        touched = np.nonzero(counts)[0]
+        shift = counts[touched]
+        old = self.recent[touched]
+        shifted = np.full_like(old, np.nan)
+        columns = np.arange(window)[None, :] + shift[:, None]  # source column for each destination
+        keep = columns < window
+        rows = np.nonzero(keep)[0]
+        shifted[keep] = old[rows, columns[keep]]
+        self.recent[touched] = shifted
+
+        # Rank each new session from the newest (0) within its player's batch
+        order = np.argsort(idx, kind='stable')
+        players = idx[order]
+        group_start = np.searchsorted(players, players, side='left')
+        position = np.arange(len(players)) - group_start
+        from_newest = counts[players] - 1 - position
+        fits = from_newest < window
+        self.recent[players[fits], window - 1 - from_newest[fits]] = nets[order][fits]
+
+    def table(self):
+        """Return one dict per player, biggest winner first"""
+        if not self.names:
+            return []
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roi = np.where(self.total_buy > 0, self.net / self.total_buy, np.nan)
+            mean = self.net / self.sessions
+            variance = np.where(self.sessions > 1,
+                                (self.net_sq - self.sessions * mean ** 2) / (self.sessions - 1), 0.0)
+            filled = np.sum(~np.isnan(self.recent), axis=1)
+            rolling = np.where(filled > 0, np.nansum(self.recent, axis=1) / filled, np.nan)
+        order = np.argsort(-self.net, kind='stable')
+        return [{
+            'name': self.names[i],
+            'sessions': int(self.sessions[i]),
+            'net': int(self.net[i]),
+            'roi': float(roi[i]),
+            'variance': float(max(variance[i], 0.0)),
+            'wins': int(self.wins[i]),
+            'streak': int(self.streak[i]),
+            'best_streak': int(self.best_streak[i]),
+            'worst_streak': int(self.worst_streak[i]),
+            'rolling_avg': float(rolling[i])
+        } for i in order]
@@ -0,0 +1,366 @@
+"""Optional table sync between devices over the local network.
+
+One device (or a laptop) runs the server:
+
+    python sync.py --host 0.0.0.0 --port 8765
+
+and every app pointed at it becomes a client. Messages are JSON lines.
+Clients send batches of per-player deltas: buy-ins as increments, chips and
+debt as new values, and, for players the client hasn't seen from the server,
+their initial state. The server merges each batch into its table, giving
+every changed player a new version, acknowledges the batch to its sender and
+sends the changed players only to the other clients. So traffic follows the
+changes, not the size of the table. Chips and debt are last writer wins;
+buy-ins are added, so they never conflict. An initial state only creates a
+player: if the server already has one by that name, its row wins and is
+sent to the client like any other. Players are matched by name, ignoring
+case.
+"""
+import argparse
+import asyncio
+import json
+import threading
+import uuid
+from collections import deque
+
+
+DEFAULT_PORT = 8765
+# Longest message line accepted; a welcome carries the whole table
+LINE_LIMIT = 16 * 1024 * 1024
+
+
+def encode_message(message):
+    return (json.dumps(message, separators=(',', ':')) + "\n").encode('utf-8')
+
+
+class SyncServer:
+    """Holds the merged table and relays each client's changes to the others"""
+
+    def __init__(self):
+        self.version = 0
+        self.players = {}  # name key -> [name, version, total_buy, chips, debt]
+        self.last_seq = {}  # client id -> seq of the last batch merged from it
+        self.writers = set()
+
+    def merge(self, client, seq, changes):
+        """Apply one batch; return the changed player rows, or None if the batch was already merged"""
+        if seq <= self.last_seq.get(client, 0):
+            return None  # resent after a reconnect
+        self.last_seq[client] = seq
+        changed = {}
+        for change in changes:
+            key = change['n'].lower()
+            row = self.players.get(key)
+            if row is None:
+                row = self.players[key] = [change['n'], 0, *change.get('i', (0, 0, 0))]
+            row[2] += change.get('b', 0)
+            if 'c' in change:
+                row[3] = change['c']
+            if 'd' in change:
+                row[4] = change['d']
+            self.version += 1
+            row[1] = self.version
+            changed[key] = row
+        return list(changed.values())
+
+    def rows_since(self, version):
+        return [row for row in self.players.values() if row[1] > version]
+
+    async def handle(self, reader, writer):
+        client = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if message['t'] == 'hello':
+                    client = message['client']
+                    self.writers.add(writer)
+                    writer.write(encode_message({'t': 'welcome', 'version': self.version,
+                                                 'last_seq': self.last_seq.get(client, 0),
+                                                 'players': self.rows_since(message.get('since', 0))}))
+                elif message['t'] == 'delta' and client is not None:
+                    rows = self.merge(client, message['seq'], message['changes'])
+                    writer.write(encode_message({'t': 'ack', 'seq': message['seq'], 'version': self.version}))
+                    if rows:
+                        diff = encode_message({'t': 'diff', 'version': self.version, 'players': rows})
+                        for other in self.writers:
+                            if other is not writer:
+                                other.write(diff)
+                await writer.drain()
+        except (ConnectionError, ValueError, KeyError) as e:
+            print(f"Sync client dropped: {e}")
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    async def serve(self, host='0.0.0.0', port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT)
+        print(f"Sync server listening on {', '.join(str(s.getsockname()) for s in server.sockets)}")
+        async with server:
+            await server.serve_forever()
+
+
+class SyncClient:
+    """Keeps a Ledger in step with a SyncServer
+
+    The network runs on an asyncio loop in a background thread. Everything that
+    touches the ledger runs on the main thread: received messages are queued
+    and handed over through call_on_main(fn), in the order they arrived, and
+    local changes are batched until flush() is called (the app calls it a few
+    times a second). on_applied() is called on the main thread after remote
+    changes were applied. applying, if given, returns a context manager that
+    is entered around every application of remote changes, so listeners of the
+    ledger can tell them from local ones.
+    """
+
+    RETRY_DELAY = 2.0
+    # Most player changes sent in one batch
+    MAX_BATCH = 500
+
+    def __init__(self, host, port, call_on_main, on_applied=None, applying=None):
+        self.host = host
+        self.port = port
+        self.call_on_main = call_on_main
+        self.on_applied = on_applied
+        self.applying = applying
+        self.client_id = uuid.uuid4().hex
+        self.ledger = None
+        self.connected = False
+        self.version = 0  # newest server version seen
+        self.seq = 0
+        self.pending = {}  # name key -> change not yet sent
+        self.in_flight = []  # (seq, {name key: change}) sent but not yet acknowledged
+        self.known = set()  # name keys the server has
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._index = {}  # name key -> ledger index
+        self._applying = False
+        self._inbox = deque()
+        self._loop = None
+        self._writer = None
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='SyncClient', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopping = True
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._close_writer)
+        self._thread.join(timeout=2)
+
+    # Main thread
+
+    def attach(self, ledger):
+        """Follow a (new) ledger; players the server doesn't know yet are uploaded"""
+        if self.ledger is not None and self.on_event in self.ledger.listeners:
+            self.ledger.listeners.remove(self.on_event)
+        self.ledger = ledger
+        ledger.listeners.append(self.on_event)
+        self._index = {}
+        for i, player in enumerate(ledger.players):
+            self._index.setdefault(player.name.lower(), i)
+        self._upload_unknown()
+
+    def _upload_unknown(self):
+        uploading = set(self.pending).union(*(batch for _, batch in self.in_flight))
+        for key, i in self._index.items():
+            if key not in self.known and key not in uploading:
+                player = self.ledger.players[i]
+                self.pending[key] = {'n': player.name, 'i': [player.total_buy, player.chips, player.debt]}
+
+    def _change(self, index):
+        player = self.ledger.players[index]
+        key = player.name.lower()
+        change = self.pending.get(key)
+        if change is None:
+            change = self.pending[key] = {'n': player.name}
+        return change
+
+    def on_event(self, event):
+        """Ledger listener: add a local change to the next batch"""
+        if self._applying:
+            return
+        kind = event[0]
+        if kind == 'add_player':
+            index = len(self.ledger.players) - 1
+            key = event[1].lower()
+            self._index.setdefault(key, index)
+            if key not in self.known:
+                self._change(index)['i'] = [0, 0, 0]
+        elif kind == 'remove_player':
+            # Only undo of a just-added player removes one; the other devices keep it
+            key = event[1].lower()
+            if self._index.get(key) == len(self.ledger.players):
+                del self._index[key]
+                self.pending.pop(key, None)
+        elif kind == 'buy':
+            change = self._change(event[1])
+            change['b'] = change.get('b', 0) + event[2]
+        elif kind == 'set_chips':
+            self._change(event[1])['c'] = event[3]
+        elif kind == 'set_debt':
+            self._change(event[1])['d'] = event[3]
+
+    def flush(self, *args):
+        """Send everything changed since the last flush as one batch"""
+        if not self.connected or not self.pending:
+            return
+        items = list(self.pending.items())
+        self.pending = {}
+        for start in range(0, len(items), self.MAX_BATCH):
+            self.seq += 1
+            batch = dict(items[start:start + self.MAX_BATCH])
+            self.in_flight.append((self.seq, batch))
+            self._send({'t': 'delta', 'seq': self.seq, 'changes': list(batch.values())})
+
+    def _send(self, message):
+        data = encode_message(message)
+        self.bytes_sent += len(data)
+        self._loop.call_soon_threadsafe(self._write, data)
+
+    def _drain(self, *args):
+        """Handle queued network events in arrival order"""
+        applied = False
+        while self._inbox:
+            kind, message = self._inbox.popleft()
+            if kind == 'connected':
+                self.connected = True
+                self._send({'t': 'hello', 'client': self.client_id, 'since': self.version})
+                for seq, batch in self.in_flight:
+                    self._send({'t': 'delta', 'seq': seq, 'changes': list(batch.values())})
+            elif kind == 'disconnected':
+                self.connected = False
+            elif message['t'] == 'welcome':
+                self._settle(lambda seq: seq <= message['last_seq'])
+                applied = self._apply(message['players']) or applied
+                self.version = max(self.version, message['version'])
+                self._upload_unknown()
+            elif message['t'] == 'ack':
+                self._settle(lambda seq: seq == message['seq'])
+                self.version = max(self.version, message['version'])
+            elif message['t'] == 'diff':
+                applied = self._apply(message['players']) or applied
+                self.version = max(self.version, message['version'])
+        if applied and self.on_applied:
+            self.on_applied()
+
+    def _settle(self, merged):
+        """Drop the in-flight batches the server has merged; their players are known to it from now on"""
+        remaining = []
+        for seq, batch in self.in_flight:
+            if merged(seq):
+                self.known.update(batch)
+            else:
+                remaining.append((seq, batch))
+        self.in_flight = remaining
+
+    def _unreflected(self, key):
+        """Local changes to a player the server's rows don't include yet, oldest first"""
+        changes = [batch[key] for _, batch in self.in_flight if key in batch]
+        if key in self.pending:
+            changes.append(self.pending[key])
+        return changes
+
+    def _apply(self, rows):
+        """Bring the ledger in line with server rows, keeping local changes the server hasn't seen
+
+        A row for a player means the server had it before any initial state
+        still on its way there, so that state is ignored, and dropped if unsent.
+        """
+        if not rows:
+            return False
+        self._applying = True
+        try:
+            if self.applying is not None:
+                with self.applying():
+                    self._apply_rows(rows)
+            else:
+                self._apply_rows(rows)
+        finally:
+            self._applying = False
+        return True
+
+    def _apply_rows(self, rows):
+        for name, _, total_buy, chips, debt in rows:
+            key = name.lower()
+            self.known.add(key)
+            change = self.pending.get(key)
+            if change is not None:
+                change.pop('i', None)
+                if len(change) == 1:
+                    del self.pending[key]
+            index = self._index.get(key)
+            if index is None:
+                self.ledger.add_player(name)
+                index = self._index[key] = len(self.ledger.players) - 1
+            local = self._unreflected(key)
+            target = total_buy + sum(change.get('b', 0) for change in local)
+            delta = target - self.ledger.players[index].total_buy
+            if delta:
+                self.ledger.buy(index, delta)
+            if not any('c' in change for change in local):
+                self.ledger.set_chips(index, chips)
+            if not any('d' in change for change in local):
+                self.ledger.set_debt(index, debt)
+
+    # Background loop
+
+    def _post(self, kind, message=None):
+        self._inbox.append((kind, message))
+        self.call_on_main(self._drain)
+
+    def _write(self, data):
+        if self._writer is not None:
+            self._writer.write(data)
+
+    def _close_writer(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def _run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        while not self._stopping:
+            try:
+                reader, self._writer = await asyncio.open_connection(self.host, self.port, limit=LINE_LIMIT)
+            except OSError as e:
+                print(f"Sync server not reachable: {e}")
+                await asyncio.sleep(self.RETRY_DELAY)
+                continue
+            self._post('connected')
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    self.bytes_received += len(line)
+                    self._post('message', json.loads(line))
+            except (ConnectionError, ValueError) as e:
+                print(f"Sync connection lost: {e}")
+            self._writer.close()
+            self._writer = None
+            self._post('disconnected')
+            if not self._stopping:
+                await asyncio.sleep(self.RETRY_DELAY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Table sync server for Taki Poker Tracker")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(SyncServer().serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,41 +1,51 @@
+from perf import startup, instrumentation  # first, so the startup clock also covers Kivy's imports
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
 from kivy.uix.textinput import TextInput
 from kivy.uix.button import Button
-from kivy.uix.scrollview import ScrollView
-from kivy.uix.gridlayout import GridLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.uix.tabbedpanel import TabbedPanel, TabbedPanelItem
-from kivy.uix.popup import Popup
 from kivy.metrics import dp, sp
+from kivy.clock import Clock
 #from kivy.core.window import Window
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 import tempfile
-import json
+import threading
+import time
 
+from ledger import Ledger, parse_amount
+from logwriter import LogWriter, LogTail
+from savestate import SaveWorker
+from journal import Journal
+from snapshot import encode as encode_snapshot
+from names import read_roster
 
-class PlayerFrame(BoxLayout):
-    def __init__(self, index, player_name, on_buy_callback, on_log_callback, **kwargs):
+startup.mark('imports')
+
+
+class PlayerFrame(RecycleDataViewBehavior, BoxLayout):
+    """Recycled row view showing one entry of PlayerList.data"""
+
+    def __init__(self, **kwargs):
         super().__init__(orientation='vertical', spacing=dp(3), size_hint_y=None, padding=dp(5), **kwargs)
         self.height = dp(60)
 
-        self.total_buy = 0
-        self.player_name = player_name
-        self.on_buy_callback = on_buy_callback
-        self.on_log_callback = on_log_callback
-
-        # Display indexed and capitalized player name
-        formatted_name = f"{index}. {player_name.capitalize()}"
+        self.index = None
+        self.player_data = None
+        self.player_list = None
 
         # Row 1: Name, Buy input, Buy button, Total, Debt, Chips
         row1 = BoxLayout(orientation='horizontal', spacing=dp(2), size_hint_y=None, height=dp(30))
-        self.label_name = Label(text=formatted_name, font_size=sp(12), bold=True, size_hint_x=0.15, halign='left')
+        self.label_name = Label(text="", font_size=sp(12), bold=True, size_hint_x=0.15, halign='left')
         self.label_name.bind(size=self.label_name.setter('text_size'))
         row1.add_widget(self.label_name)
         
         self.input_buy = TextInput(hint_text="0", input_filter="int", multiline=False, size_hint_x=0.12, font_size=sp(12))
-        self.input_buy.bind(focus=self.on_focus_buy)
+        self.input_buy.bind(focus=self.on_focus_buy, text=self.on_buy_text)
         row1.add_widget(self.input_buy)
         
         self.button_buy = Button(text="Buy", size_hint_x=0.12, font_size=sp(10))
@@ -48,12 +58,12 @@ class PlayerFrame(BoxLayout):
         
         row1.add_widget(Label(text="D:", size_hint_x=0.08, font_size=sp(10)))
         self.input_debt = TextInput(hint_text="0", input_filter="int", multiline=False, size_hint_x=0.12, font_size=sp(12))
-        self.input_debt.bind(focus=self.on_focus_debt)
+        self.input_debt.bind(focus=self.on_focus_debt, text=self.on_debt_text)
         row1.add_widget(self.input_debt)
         
         row1.add_widget(Label(text="C:", size_hint_x=0.08, font_size=sp(10)))
         self.input_chips = TextInput(hint_text="0", input_filter="int", multiline=False, size_hint_x=0.12, font_size=sp(12))
-        self.input_chips.bind(focus=self.on_focus_chips)
+        self.input_chips.bind(focus=self.on_focus_chips, text=self.on_chips_text)
         row1.add_widget(self.input_chips)
         self.add_widget(row1)
 
@@ -65,6 +75,40 @@ class PlayerFrame(BoxLayout):
         row2.add_widget(self.label_sum)
         self.add_widget(row2)
 
+    def refresh_view_attrs(self, rv, index, data):
+        """Bind this row to the player at index"""
+        # Detach first so setting the inputs below doesn't write back into the ledger
+        self.player_data = None
+        self.player_list = rv
+        self.index = index
+        player = rv.ledger.players[index]
+        # Display indexed and capitalized player name
+        self.label_name.text = f"{index + 1}. {player.name.capitalize()}"
+        self.label_total_buy.text = str(player.total_buy)
+        self.input_buy.text = data['buy']
+        self.input_debt.text = str(player.debt) if player.debt else ""
+        self.input_chips.text = str(player.chips) if player.chips else ""
+        self.label_sum.text = str(data['sum'])
+        self.player_data = data
+
+    def refresh_totals(self):
+        """Update just the derived labels of the bound row"""
+        self.label_total_buy.text = str(self.player_list.ledger.players[self.index].total_buy)
+        self.label_sum.text = str(self.player_data['sum'])
+
+    def on_buy_text(self, instance, value):
+        """Keep the typed buy amount with the entry so it survives recycling"""
+        if self.player_data is not None:
+            self.player_data['buy'] = value
+
+    def on_debt_text(self, instance, value):
+        if self.player_data is not None:
+            self.player_list.ledger.set_debt(self.index, parse_amount(value))
+
+    def on_chips_text(self, instance, value):
+        if self.player_data is not None:
+            self.player_list.ledger.set_chips(self.index, parse_amount(value))
+
     def on_focus_buy(self, instance, value):
         """Clear text when focused for easy input"""
         if value and instance.text == "":  # When focused and empty
@@ -83,69 +127,217 @@ class PlayerFrame(BoxLayout):
             instance.select_all()
 
     def calculate_buy(self, instance):
-        try:
-            buy_value = int(self.input_buy.text) if self.input_buy.text else 0
-        except ValueError:
-            buy_value = 0
+        if self.player_list is not None:
+            self.player_list.calculate_buy(self.index)
+
+
+class PlayerList(RecycleView):
+    """Virtualized view of a Ledger; only the visible rows are widgets"""
+
+    def __init__(self, ledger, on_buy_callback, on_log_callback, **kwargs):
+        super().__init__(**kwargs)
+        self.ledger = ledger
+        self.on_buy_callback = on_buy_callback
+        self.on_log_callback = on_log_callback
+
+        layout = RecycleBoxLayout(orientation='vertical', spacing=dp(5), padding=dp(3), size_hint_y=None,
+                                  default_size=(None, dp(60)), default_size_hint=(1, None))
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        self.viewclass = PlayerFrame  # must be set after the layout manager is added
+
+    @staticmethod
+    def new_row_data(player):
+        """Create the view-only state kept beside each ledger player"""
+        return {'buy': '', 'sum': player.sum}
+
+    def add_player(self, player_name):
+        player = self.ledger.add_player(player_name)
+        self.data.append(self.new_row_data(player))
+
+    def add_players(self, player_names):
+        """Add several players with a single data update, so the list is laid out once"""
+        self.data.extend([self.new_row_data(self.ledger.add_player(name)) for name in player_names])
+
+    @instrumentation.timed
+    def calculate_buy(self, index):
+        row = self.data[index]
+        buy_value = parse_amount(row['buy'])
         
         if buy_value > 0:
-            self.total_buy += buy_value
-            self.label_total_buy.text = str(self.total_buy)
+            player = self.ledger.players[index]
+            self.ledger.buy(index, buy_value)
             # Log before resetting input
             if self.on_log_callback:
-                self.on_log_callback(f"{self.player_name.capitalize()} bought in for {buy_value} (Total: {self.total_buy})")
-            self.input_buy.text = ""  # Clear instead of setting to "0"
+                self.on_log_callback(f"{player.name.capitalize()} bought in for {buy_value} (Total: {player.total_buy})",
+                                     player.name)
+            row['buy'] = ""  # Clear instead of setting to "0"
+            view = self.view_adapter.get_visible_view(index)
+            if view is not None:
+                view.input_buy.text = ""
             if self.on_buy_callback:
                 self.on_buy_callback()
 
-    def calculate_sum(self, log_changes=False):
-        try:
-            chips = int(self.input_chips.text) if self.input_chips.text else 0
-        except ValueError:
-            chips = 0
-        try:
-            debt = int(self.input_debt.text) if self.input_debt.text else 0
-        except ValueError:
-            debt = 0
-        total = chips - debt
-        self.label_sum.text = str(total)
-        
-        if log_changes and self.on_log_callback:
-            if chips > 0 or debt > 0:
-                self.on_log_callback(f"{self.player_name.capitalize()} - Chips: {chips}, Debt: {debt}, Sum: {total}")
-        
-        return chips  # Return chips for total calculation
+    def calculate_all_sums(self, log_changes=False):
+        """Refresh every player's displayed sum and return the total chips"""
+        for player, row in zip(self.ledger.players, self.data):
+            row['sum'] = player.sum
+            if log_changes and self.on_log_callback:
+                if player.chips > 0 or player.debt > 0:
+                    self.on_log_callback(f"{player.name.capitalize()} - Chips: {player.chips}, Debt: {player.debt}, Sum: {player.sum}",
+                                         player.name)
+        return self.ledger.total_chips
 
-    def get_total_buy(self):
-        return self.total_buy
-    
-    def get_player_data(self):
-        """Get player data for saving"""
-        return {
-            'name': self.player_name,
-            'total_buy': self.total_buy,
-            'debt': self.input_debt.text,
-            'chips': self.input_chips.text
-        }
-    
-    def set_player_data(self, data):
-        """Set player data from loaded data"""
-        self.total_buy = data.get('total_buy', 0)
-        self.label_total_buy.text = str(self.total_buy)
-        self.input_debt.text = data.get('debt', '')
-        self.input_chips.text = data.get('chips', '')
-        self.calculate_sum(log_changes=False)
+    def refresh_rows(self, indices=None, full=False):
+        """Push ledger changes into the visible rows (all of them if indices is None)
+
+        Rows off screen pick the values up when they are next recycled into view.
+        With full, inputs are reset from the ledger too, not only the derived labels.
+        """
+        views = self.view_adapter.views
+        if indices is not None:
+            views = {index: views[index] for index in indices if index in views}
+        for index, view in views.items():
+            if index >= len(self.data):
+                continue
+            if full:
+                view.refresh_view_attrs(self, index, self.data[index])
+            else:
+                view.refresh_totals()
+
+    def sync_from_ledger(self):
+        """Rebuild the row data from the ledger in a single data assignment"""
+        self.data = [self.new_row_data(player) for player in self.ledger.players]
+
+
+class LogLine(RecycleDataViewBehavior, Label):
+    """Single recycled line of a LineView; tapping it shows a cut-off line in full"""
+
+    def __init__(self, **kwargs):
+        super().__init__(font_size=sp(14), halign='left', valign='middle', shorten=True, shorten_from='right', **kwargs)
+        self.index = None
+        self.line_view = None
+        self.bind(size=self.setter('text_size'))
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        self.line_view = rv
+        self.shorten = 'size' not in data  # an expanded line has its measured size
+        # The layout applies the size; only the text goes on the label
+        return super().refresh_view_attrs(rv, index, {'text': data['text']})
+
+    def on_touch_down(self, touch):
+        if self.line_view is not None and self.collide_point(*touch.pos) and not touch.is_mouse_scrolling:
+            self.line_view.toggle_line(self.index, self.width)
+            return True
+        return super().on_touch_down(touch)
+
+
+class LineView(RecycleView):
+    """Read-only recycled list of text lines; only the visible lines are laid out
+
+    Lines are one row high and cut off at the right edge. A tapped line is
+    measured and given the height its wrapped text needs, in its data item,
+    until it is tapped again.
+    """
+
+    LINE_HEIGHT = 22
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.showing_message = False
+
+        layout = RecycleBoxLayout(orientation='vertical', size_hint_y=None, key_size='size',
+                                  default_size=(None, dp(self.LINE_HEIGHT)), default_size_hint=(1, None))
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        self.viewclass = LogLine  # must be set after the layout manager is added
+
+    def show_message(self, text):
+        """Show a placeholder or error that the next append replaces"""
+        self.data = [{'text': text}]
+        self.showing_message = True
+
+    def set_lines(self, lines):
+        self.data = [{'text': line} for line in lines]
+        self.showing_message = False
+
+    def toggle_line(self, index, width):
+        """Wrap a cut-off line over as many rows as it needs, or cut it off again"""
+        if index is None or index >= len(self.data):
+            return
+        item = {'text': self.data[index]['text']}
+        if 'size' not in self.data[index]:
+            from kivy.core.text import Label as CoreLabel
+            label = CoreLabel(text=item['text'], font_size=sp(14), text_size=(width, None))
+            label.refresh()
+            height = label.texture.height + dp(4)
+            if height <= dp(self.LINE_HEIGHT):
+                return  # nothing was cut off
+            item['size'] = (None, height)
+        self.data[index] = item
+
+    def append_lines(self, lines):
+        if self.showing_message:
+            self.set_lines(lines)
+        else:
+            self.data.extend({'text': line} for line in lines)
+        self.scroll_y = 0  # Scroll to bottom to show latest entries
 
 
 class MainApp(App):
+    # Seconds without changes before a coalesced edit is committed to the journal
+    SAVE_DELAY = 0.5
+    # Player rows added per frame while restoring a saved game
+    RESTORE_CHUNK = 100
+    # Label to refresh for each summary marked dirty
+    SUMMARY_LABELS = {'total_buy': 'total_buy_label', 'total_chips': 'total_chips_label'}
+    # Seconds between batches of local changes sent to the sync server
+    SYNC_INTERVAL = 0.25
+    # Known names offered under the name input
+    NAME_SUGGESTIONS = 4
+
+    def build_config(self, config):
+        config.setdefaults('sync', {'server': ''})
+
+    def build_settings(self, settings):
+        import json
+        settings.add_json_panel('Taki', self.config, data=json.dumps([
+            {'type': 'title', 'title': 'Table sync'},
+            {'type': 'string', 'title': 'Sync server', 'section': 'sync', 'key': 'server',
+             'desc': 'host:port of a running sync.py server; leave empty to play offline'},
+        ]))
+
+    def on_config_change(self, config, section, key, value):
+        if (section, key) == ('sync', 'server'):
+            self.start_sync(value)
+
     def build(self):
         # Set window size to simulate mobile screen (comment out for desktop use)
         #Window.size = (360, 640)  # Typical mobile screen in portrait
         
-        self.players = []
+        self.ledger = Ledger()
         self.log_file_path = os.path.join(tempfile.gettempdir(), 'taki_game_log.txt')
-        self.save_file_path = os.path.join(tempfile.gettempdir(), 'taki_game_data.json')
-        self.init_log_file()
+        self.save_file_path = os.path.join(tempfile.gettempdir(), 'taki_game_data.bin')
+        self.log_writer = LogWriter(self.log_file_path)
+        self.log_tail = LogTail(self.log_writer)
+        self.save_worker = SaveWorker(self.save_file_path, encode=encode_snapshot)
+        # Saves from before the binary format are migrated on first load
+        self.journal = Journal(self.save_file_path, os.path.join(tempfile.gettempdir(), 'taki_game_journal'),
+                               self.save_worker,
+                               legacy_path=os.path.join(tempfile.gettempdir(), 'taki_game_data.json'))
+        self.journal.attach(self.ledger)
+        self.ledger.listeners.append(self.on_ledger_event)
+        self._history = None
+        self._save_trigger = Clock.create_trigger(self.write_game_data, self.SAVE_DELAY)
+        # Display changes accumulate here and are drawn together once per frame
+        self._dirty_rows = set()
+        self._dirty_all_rows = None  # None, 'totals' or 'full'
+        self._dirty_labels = set()
+        self._ui_trigger = Clock.create_trigger(self.flush_ui)
+        # Opening the log can wait for the first tick; nothing is logged before then
+        Clock.schedule_once(lambda dt: self.init_log_file(new_session=False))
+        startup.mark('core')
 
         self.total_buy_label = Label(text="0", font_size=sp(18), bold=True)
         self.total_chips_label = Label(text="0", font_size=sp(18), bold=True)
@@ -156,13 +348,14 @@ class MainApp(App):
         # Game tab
         game_tab = TabbedPanelItem(text='Game')
         main_layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
+        self.game_layout = main_layout
 
         # Date layout with comments on the right
         date_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(80), spacing=dp(5))
         
         # Left side: Date
         date_section = BoxLayout(orientation='horizontal', size_hint_x=0.4)
-        current_date = datetime.now().strftime("%Y-%m-%d")
+        current_date = self.ledger.date
         date_label = Label(text="Date:", size_hint_x=0.35, font_size=sp(16), halign='left', valign='middle')
         self.date_display = Label(text=current_date, size_hint_x=0.65, font_size=sp(16), halign='left', valign='middle')
         for widget in [date_label, self.date_display]:
@@ -181,7 +374,7 @@ class MainApp(App):
             font_size=sp(12),
             write_tab=False
         )
-        self.comments_input.bind(focus=self.on_comments_unfocus)
+        self.comments_input.bind(focus=self.on_comments_unfocus, text=self.on_comments_text)
         comments_section.add_widget(comments_label)
         comments_section.add_widget(self.comments_input)
         
@@ -192,18 +385,31 @@ class MainApp(App):
         # Players input row
         player_input_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(40), spacing=dp(5))
         self.player_name_input = TextInput(hint_text="Player name", multiline=False, font_size=sp(14), size_hint_x=0.5)
-        self.add_player_button = Button(text="Add", font_size=sp(14), size_hint_x=0.3)
+        self.player_name_input.bind(focus=self.on_name_focus, text=self.update_name_suggestions)
+        self.add_player_button = Button(text="Add", font_size=sp(14), size_hint_x=0.25)
         self.add_player_button.bind(on_press=self.add_player)
+        self.import_button = Button(text="Import", font_size=sp(14), size_hint_x=0.25)
+        self.import_button.bind(on_press=self.show_roster_import)
         player_input_layout.add_widget(self.player_name_input)
         player_input_layout.add_widget(self.add_player_button)
+        player_input_layout.add_widget(self.import_button)
         main_layout.add_widget(player_input_layout)
 
-        # Scrollable area for players
-        self.scroll = ScrollView(size_hint=(1, 1))
-        self.players_layout = GridLayout(cols=1, spacing=dp(5), size_hint_y=None, padding=dp(3))
-        self.players_layout.bind(minimum_height=self.players_layout.setter('height'))
-        self.scroll.add_widget(self.players_layout)
-        main_layout.add_widget(self.scroll)
+        # Known names matching what has been typed; collapsed while there are none
+        self.name_index = None  # loaded from the history the first time the name input is focused
+        self._name_index_thread = None
+        self._seated = set()  # lower-cased names at the table, taken when the name input is focused
+        self.name_suggestions = BoxLayout(orientation='horizontal', size_hint_y=None, height=0, spacing=dp(5))
+        for _ in range(self.NAME_SUGGESTIONS):
+            button = Button(text="", font_size=sp(13), opacity=0, disabled=True)
+            button.bind(on_press=self.pick_name_suggestion)
+            self.name_suggestions.add_widget(button)
+        main_layout.add_widget(self.name_suggestions)
+
+        # Scrollable area for players - only the visible rows are real widgets
+        self.player_list = PlayerList(self.ledger, on_buy_callback=self.on_buy, on_log_callback=self.log_event,
+                                      size_hint=(1, 1))
+        main_layout.add_widget(self.player_list)
 
         # Total Buy-Ins and Chips Summary
         summary_layout = BoxLayout(orientation='vertical', size_hint_y=None, height=dp(100), spacing=dp(5), padding=dp(10))
@@ -224,12 +430,30 @@ class MainApp(App):
         buttons_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(60), spacing=dp(5))
         
         # Calculate button
-        self.calculate_button = Button(text="Calculate", size_hint_x=0.6, font_size=sp(18))
+        self.calculate_button = Button(text="Calculate", size_hint_x=0.24, font_size=sp(18))
         self.calculate_button.bind(on_press=self.calculate_all)
         buttons_layout.add_widget(self.calculate_button)
         
+        # Settle button - who pays whom
+        self.settle_button = Button(text="Settle", size_hint_x=0.16, font_size=sp(16))
+        self.settle_button.bind(on_press=self.show_settlement)
+        buttons_layout.add_widget(self.settle_button)
+        
+        # Undo / Redo buttons
+        self.undo_button = Button(text="Undo", size_hint_x=0.12, font_size=sp(14))
+        self.undo_button.bind(on_press=self.undo)
+        buttons_layout.add_widget(self.undo_button)
+        self.redo_button = Button(text="Redo", size_hint_x=0.12, font_size=sp(14))
+        self.redo_button.bind(on_press=self.redo)
+        buttons_layout.add_widget(self.redo_button)
+        
+        # Settings button - the sync server is set there; not every phone has a menu key
+        self.settings_button = Button(text="Settings", size_hint_x=0.14, font_size=sp(12))
+        self.settings_button.bind(on_press=lambda x: self.open_settings())
+        buttons_layout.add_widget(self.settings_button)
+        
         # Clear All Data button
-        self.clear_button = Button(text="Clear All", size_hint_x=0.4, font_size=sp(16), background_color=(0.8, 0.2, 0.2, 1))
+        self.clear_button = Button(text="Clear All", size_hint_x=0.22, font_size=sp(16), background_color=(0.8, 0.2, 0.2, 1))
         self.clear_button.bind(on_press=self.confirm_clear_data)
         buttons_layout.add_widget(self.clear_button)
         
@@ -238,82 +462,254 @@ class MainApp(App):
         game_tab.add_widget(main_layout)
         tabbed_panel.add_widget(game_tab)
         
-        # Log tab
+        # Log tab - its content is built the first time it is opened
         self.log_tab = TabbedPanelItem(text='Log')
-        log_layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
+        self.log_display = None
+        self.log_filter = None  # (player, start, end) while the Log tab shows a filtered view
+        tabbed_panel.add_widget(self.log_tab)
         
-        # Show log file path
-        log_path_label = Label(text=f"Log: {self.log_file_path}", size_hint_y=None, height=dp(40), font_size=sp(12))
-        log_layout.add_widget(log_path_label)
+        # Stats tab
+        self.stats_tab = TabbedPanelItem(text='Stats')
+        stats_layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
         
-        # Refresh button for log
-        refresh_button = Button(text="Refresh Log", size_hint_y=None, height=dp(60), font_size=sp(16))
-        refresh_button.bind(on_press=self.refresh_log)
-        log_layout.add_widget(refresh_button)
+        stats_refresh_button = Button(text="Refresh Stats", size_hint_y=None, height=dp(60), font_size=sp(16))
+        stats_refresh_button.bind(on_press=self.refresh_stats)
+        stats_layout.add_widget(stats_refresh_button)
         
-        # Log display area - using TextInput for better display
-        self.log_display = TextInput(
-            text="Game log will appear here...",
-            readonly=True,
-            multiline=True,
-            size_hint=(1, 1),
-            background_color=(0.1, 0.1, 0.1, 1),
-            foreground_color=(1, 1, 1, 1),
-            font_size=sp(14)
-        )
-        log_layout.add_widget(self.log_display)
+        # One line per player over all archived sessions
+        self.stats_display = LineView(size_hint=(1, 1))
+        self.stats_display.show_message("Stats of archived games will appear here...")
+        stats_layout.add_widget(self.stats_display)
         
-        self.log_tab.add_widget(log_layout)
-        tabbed_panel.add_widget(self.log_tab)
+        self.stats_tab.add_widget(stats_layout)
+        tabbed_panel.add_widget(self.stats_tab)
+        self.player_stats = None
+        self._stats_thread = None
+        self._stats_again = False
+        
+        # Diagnostics tab - built the first time it is opened
+        self.diagnostics_tab = TabbedPanelItem(text='Diagnostics')
+        self.diagnostics_display = None
+        tabbed_panel.add_widget(self.diagnostics_tab)
+        self._frame_sampler = None
+        self._memory_sampler = None
+        
+        # Table sync, if a server is configured
+        self.sync_client = None
+        self._sync_flush = None
+        if self.config and self.config.get('sync', 'server'):
+            Clock.schedule_once(lambda dt: self.start_sync(self.config.get('sync', 'server')))
         
         # Bind tab switch event to refresh log
         self.log_tab.bind(on_press=self.on_log_tab_press)
         tabbed_panel.bind(current_tab=self.on_tab_switch)
         
-        # Load saved data if exists
-        self.load_game_data()
+        self._clear_popup = None
+        self._roster_popup = None
+        startup.mark('ui')
         
+        # Restore saved data, if any, once the shell is on screen
+        self.restoring = False
+        self._restore_thread = None
+        self._restore_started = None
+        self.restore_progress = None
+        self.restore_game_data()
+        
+        from kivy.core.window import Window
+        Window.bind(on_flip=self.on_first_frame)
+        startup.mark('build')
         return tabbed_panel
 
-    def init_log_file(self):
-        """Initialize the log file with a header"""
+    def on_first_frame(self, window):
+        """Report how long the cold start took once the first frame is on screen"""
+        window.unbind(on_flip=self.on_first_frame)
+        if not startup.first_frame():
+            return
+        print(f"Startup: {startup.summary()}")
         try:
-            with open(self.log_file_path, 'w', encoding='utf-8') as f:
-                current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                f.write(f"=== Taki Game Log ===\n")
-                f.write(f"Game started: {current_time}\n")
-                f.write(f"{'='*50}\n\n")
-                f.flush()
+            startup.append_to(os.path.join(tempfile.gettempdir(), 'taki_startup.jsonl'))
         except Exception as e:
-            print(f"Error initializing log file: {e}")
+            print(f"Error saving startup timings: {e}")
+
+    @property
+    def history(self):
+        """Archive of finished games, opened the first time it is needed"""
+        if self._history is None:
+            from history import HistoryDB
+            self._history = HistoryDB(os.path.join(tempfile.gettempdir(), 'taki_history.db'))
+        return self._history
+
+    def build_log_tab(self):
+        """Create the Log tab's widgets on first use"""
+        if self.log_display is not None:
+            return
+        log_layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
+        
+        # Show log file path
+        log_path_label = Label(text=f"Log: {self.log_file_path}", size_hint_y=None, height=dp(40), font_size=sp(12))
+        log_layout.add_widget(log_path_label)
+        
+        # Filter by player and/or time range, looked up through the log index
+        filter_layout = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(40), spacing=dp(5))
+        self.log_player_input = TextInput(hint_text="Player", multiline=False, font_size=sp(12), size_hint_x=0.3)
+        self.log_from_input = TextInput(hint_text="From HH:MM", multiline=False, font_size=sp(12), size_hint_x=0.25)
+        self.log_to_input = TextInput(hint_text="To HH:MM", multiline=False, font_size=sp(12), size_hint_x=0.25)
+        filter_button = Button(text="Filter", font_size=sp(14), size_hint_x=0.2)
+        filter_button.bind(on_press=self.filter_log)
+        for widget in (self.log_player_input, self.log_from_input, self.log_to_input, filter_button):
+            filter_layout.add_widget(widget)
+        log_layout.add_widget(filter_layout)
+        
+        # Refresh button for log; also leaves a filtered view
+        refresh_button = Button(text="Refresh Log", size_hint_y=None, height=dp(60), font_size=sp(16))
+        refresh_button.bind(on_press=self.show_live_log)
+        log_layout.add_widget(refresh_button)
+        
+        # Log display area - recycled lines, filled incrementally by refresh_log
+        self.log_display = LineView(size_hint=(1, 1))
+        self.log_display.show_message("Game log will appear here...")
+        log_layout.add_widget(self.log_display)
+        
+        self.log_tab.add_widget(log_layout)
+
+    def on_pause(self):
+        """Flush pending saves and log entries before Android may kill the app"""
+        self.flush_game_data()
+        self.log_writer.flush()
+        return True
+
+    def on_stop(self):
+        if self._restore_thread:
+            self._restore_thread.join()
+        self.start_sync("")
+        self.flush_game_data()
+        # Compact the journal so the next launch only has to read the snapshot
+        self.journal.snapshot()
+        self.save_worker.close()
+        self.journal.close()
+        if self._history is not None:
+            self._history.wait()
+        self.log_writer.close()
+
+    def start_sync(self, server):
+        """Connect to the sync server at 'host[:port]', replacing any current connection; empty disconnects"""
+        if self.sync_client is not None:
+            self._sync_flush.cancel()
+            self.sync_client.flush()
+            self.sync_client.stop()
+            self.sync_client = None
+        server = server.strip()
+        if not server:
+            return
+        from sync import SyncClient, DEFAULT_PORT
+        host, _, port = server.partition(':')
+        try:
+            port = int(port) if port else DEFAULT_PORT
+        except ValueError:
+            print(f"Error starting sync: bad port in {server}")
+            return
+        self.sync_client = SyncClient(host, port, lambda fn: Clock.schedule_once(lambda dt: fn()),
+                                      on_applied=self.render_ledger, applying=self.journal.remote)
+        self.sync_client.attach(self.ledger)
+        self._sync_flush = Clock.schedule_interval(self.sync_client.flush, self.SYNC_INTERVAL)
+        self.sync_client.start()
+        self.log_event(f"Syncing with {host}:{port}")
+
+    def init_log_file(self, new_session=True):
+        """Start the log for a new game, archiving the previous one, or carry on with the current one"""
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        header = (f"=== Taki Game Log ===\n"
+                  f"Game started: {current_time}\n"
+                  f"{'='*50}\n\n")
+        if new_session:
+            self.log_writer.rotate(header)
+        else:
+            self.log_writer.begin(header)
     
-    def log_event(self, message):
-        """Log an event to the file with timestamp"""
+    @instrumentation.timed
+    def log_event(self, message, player=None):
+        """Queue an event with timestamp; the log writer flushes it in the background
+
+        player is the name, or a tuple of names, the event concerns, for filtering the log.
+        """
+        now = datetime.now()
+        self.log_writer.write(f"[{now:%H:%M:%S}] {message}\n", now.timestamp(), player)
+    
+    @staticmethod
+    def parse_log_time(text, end=False):
+        """Turn 'HH:MM' (today), 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM' into epoch seconds, or None if blank
+
+        With end, the time just after the minute or day named is returned instead.
+        """
+        text = text.strip()
+        if not text:
+            return None
+        for fmt, step in (("%Y-%m-%d %H:%M", timedelta(minutes=1)), ("%Y-%m-%d", timedelta(days=1)),
+                          ("%H:%M", timedelta(minutes=1))):
+            try:
+                parsed = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            if fmt == "%H:%M":
+                parsed = datetime.combine(datetime.now().date(), parsed.time())
+            return (parsed + step if end else parsed).timestamp()
+        raise ValueError(f"Unrecognized time: {text}")
+    
+    def filter_log(self, instance=None):
+        """Show only the logged events for a player and/or time range"""
+        self.build_log_tab()
         try:
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            log_entry = f"[{timestamp}] {message}\n"
-            with open(self.log_file_path, 'a', encoding='utf-8') as f:
-                f.write(log_entry)
-                f.flush()  # Ensure it's written immediately
-        except Exception as e:
-            print(f"Error logging event: {e}")
+            self.log_filter = (self.log_player_input.text.strip() or None,
+                               self.parse_log_time(self.log_from_input.text),
+                               self.parse_log_time(self.log_to_input.text, end=True))
+        except ValueError as e:
+            self.log_display.show_message(f"{e} (use HH:MM, YYYY-MM-DD or YYYY-MM-DD HH:MM)")
+            return
+        if self.log_filter == (None, None, None):
+            self.show_live_log()
+            return
+        self.refresh_log()
+    
+    def show_live_log(self, instance=None):
+        """Leave any filtered view and follow the current game's log again"""
+        self.build_log_tab()
+        if self.log_filter is not None:
+            self.log_filter = None
+            self.log_tail.reset()
+            self.log_display.set_lines([])
+        self.refresh_log()
     
+    @instrumentation.timed
     def refresh_log(self, instance=None):
-        """Refresh the log display from the file"""
+        """Append the log entries written since the last refresh, or rerun the active filter"""
+        self.build_log_tab()
+        if self.log_filter is not None:
+            try:
+                entries = self.log_writer.find(*self.log_filter)
+            except Exception as e:
+                self.log_display.show_message(f"Error searching log: {e}")
+                return
+            if entries:
+                self.log_display.set_lines([f"{datetime.fromtimestamp(when):%Y-%m-%d} {line}"
+                                            for when, line in entries])
+            else:
+                self.log_display.show_message("No matching log entries.")
+            return
+        self.log_writer.flush()
         try:
-            with open(self.log_file_path, 'r', encoding='utf-8') as f:
-                f.seek(0)  # Go to start of file
-                log_content = f.read()
-                if log_content:
-                    self.log_display.text = log_content
-                    # Scroll to bottom to show latest entries
-                    self.log_display.cursor = (0, len(self.log_display.text))
-                else:
-                    self.log_display.text = "No log entries yet."
+            restarted, lines = self.log_tail.read_new()
+            if restarted:
+                self.log_display.set_lines([])
+            if lines:
+                self.log_display.append_lines(lines)
+            elif not self.log_display.data:
+                self.log_display.show_message("No log entries yet.")
         except FileNotFoundError:
-            self.log_display.text = f"Log file not found at: {self.log_file_path}"
+            self.log_tail.reset()
+            self.log_display.show_message(f"Log file not found at: {self.log_file_path}")
         except Exception as e:
-            self.log_display.text = f"Error reading log: {e}"
+            self.log_tail.reset()
+            self.log_display.show_message(f"Error reading log: {e}")
     
     def on_log_tab_press(self, instance):
         """Called when log tab is pressed"""
@@ -323,7 +719,139 @@ class MainApp(App):
         """Called when switching tabs"""
         if hasattr(value, 'text') and value.text == 'Log':
             self.refresh_log()
+        elif hasattr(value, 'text') and value.text == 'Stats':
+            self.refresh_stats()
+        elif hasattr(value, 'text') and value.text == 'Diagnostics':
+            self.refresh_diagnostics()
+    
+    def build_diagnostics_tab(self):
+        """Create the Diagnostics tab's widgets on first use"""
+        if self.diagnostics_display is not None:
+            return
+        from kivy.uix.togglebutton import ToggleButton
+        layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
+        
+        buttons = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(60), spacing=dp(5))
+        self.instrument_button = ToggleButton(text="Timing off", font_size=sp(14), size_hint_x=0.3,
+                                              state='down' if instrumentation.enabled else 'normal')
+        self.instrument_button.bind(state=lambda button, state: self.set_instrumentation(state == 'down'))
+        buttons.add_widget(self.instrument_button)
+        for text, callback in (("Refresh", self.refresh_diagnostics), ("Export", self.export_diagnostics),
+                               ("Reset", self.reset_diagnostics)):
+            button = Button(text=text, font_size=sp(14))
+            button.bind(on_press=callback)
+            buttons.add_widget(button)
+        layout.add_widget(buttons)
+        
+        # Timings, counters and memory, with a text histogram per operation
+        self.diagnostics_display = LineView(size_hint=(1, 1))
+        layout.add_widget(self.diagnostics_display)
+        
+        self.diagnostics_tab.add_widget(layout)
+        self.set_instrumentation(instrumentation.enabled)
+    
+    def set_instrumentation(self, enabled):
+        """Switch timing on or off; frame times and memory are only sampled while it is on"""
+        instrumentation.enabled = enabled
+        if enabled and self._frame_sampler is None:
+            self._frame_sampler = Clock.schedule_interval(lambda dt: instrumentation.record('frame', dt * 1000), 0)
+            self._memory_sampler = Clock.schedule_interval(lambda dt: instrumentation.sample_memory(), 1)
+            instrumentation.sample_memory()
+        elif not enabled and self._frame_sampler is not None:
+            self._frame_sampler.cancel()
+            self._memory_sampler.cancel()
+            self._frame_sampler = self._memory_sampler = None
+        if self.diagnostics_display is not None:
+            self.instrument_button.text = "Timing on" if enabled else "Timing off"
+            self.refresh_diagnostics()
+    
+    def refresh_diagnostics(self, instance=None):
+        """Show what the instrumentation has collected so far"""
+        self.build_diagnostics_tab()
+        summary = instrumentation.summary()
+        lines = [f"Startup: {startup.summary()}"]
+        if not instrumentation.enabled:
+            lines.append("Timing is off; switch it on to collect samples.")
+        for name, timing in summary['timings'].items():
+            lines.append(f"{name}: {timing['calls']} calls, p50 {timing['p50_ms']:.2f} ms, "
+                         f"p90 {timing['p90_ms']:.2f} ms, p99 {timing['p99_ms']:.2f} ms, max {timing['max_ms']:.2f} ms")
+            peak = max(count for _, count in timing['histogram'])
+            for edge, count in timing['histogram']:
+                label = f"<= {edge:g} ms" if edge is not None else "> 1000 ms"
+                lines.append(f"    {label:>12} {'#' * max(1, round(20 * count / peak))} {count}")
+        if summary['counters']:
+            lines.append("Events: " + ", ".join(f"{name} {count}" for name, count in summary['counters'].items()))
+        memory = summary['memory_kib']
+        if memory['latest'] is not None:
+            lines.append(f"Memory: {memory['latest'] / 1024:.1f} MiB (min {memory['min'] / 1024:.1f}, "
+                         f"max {memory['max'] / 1024:.1f})")
+        if self.sync_client is not None:
+            client = self.sync_client
+            lines.append(f"Sync: {'connected' if client.connected else 'offline'}, version {client.version}, "
+                         f"sent {client.bytes_sent} B, received {client.bytes_received} B")
+        self.diagnostics_display.set_lines(lines)
+    
+    def export_diagnostics(self, instance=None):
+        """Write the collected timings to a JSON file next to the game data"""
+        path = os.path.join(tempfile.gettempdir(), 'taki_diagnostics.json')
+        try:
+            instrumentation.export(path)
+            print(f"Diagnostics exported to {path}")
+            self.refresh_diagnostics()
+            self.diagnostics_display.append_lines([f"Exported to {path}"])
+        except Exception as e:
+            print(f"Error exporting diagnostics: {e}")
+    
+    def reset_diagnostics(self, instance=None):
+        instrumentation.reset()
+        self.refresh_diagnostics()
     
+    def refresh_stats(self, instance=None):
+        """Fold newly archived sessions into the player stats on a worker thread, then show them"""
+        if self._stats_thread is not None:
+            self._stats_again = True  # archived since the running update started, maybe
+            return
+        if self.stats_display.showing_message:
+            self.stats_display.show_message("Loading stats...")
+        history = self.history
+
+        def run():
+            try:
+                if self.player_stats is None:
+                    from stats import PlayerStats  # NumPy is only loaded once stats are wanted
+                    self.player_stats = PlayerStats(history, os.path.join(tempfile.gettempdir(), 'taki_stats.npz'))
+                history.wait()
+                self.player_stats.update()
+                window = self.player_stats.ROLLING_WINDOW
+                lines = [
+                    f"{row['name'].capitalize()}: net {row['net']:+d} in {row['sessions']} games, "
+                    f"ROI {row['roi']:+.0%}, sd {row['variance'] ** 0.5:.0f}, "
+                    f"streak {row['streak']:+d} (best {row['best_streak']}, worst {row['worst_streak']}), "
+                    f"last {window} avg {row['rolling_avg']:+.0f}"
+                    for row in self.player_stats.table()]
+                message = None if lines else "No archived games yet."
+            except ImportError:
+                lines, message = [], "Stats need NumPy installed."
+            except Exception as e:
+                lines, message = [], f"Error computing stats: {e}"
+            Clock.schedule_once(lambda dt: self.show_stats(lines, message))
+
+        self._stats_thread = threading.Thread(target=run, name='Stats', daemon=True)
+        self._stats_thread.start()
+
+    def show_stats(self, lines, message=None):
+        self._stats_thread = None
+        if message:
+            self.stats_display.show_message(message)
+        else:
+            self.stats_display.set_lines(lines)
+        if self._stats_again:
+            self._stats_again = False
+            self.refresh_stats()
+    
+    def on_comments_text(self, instance, value):
+        self.ledger.set_comments(value)
+
     def on_comments_unfocus(self, instance, value):
         """Save data when comments field loses focus"""
         if not value:  # When focus is lost
@@ -332,122 +860,357 @@ class MainApp(App):
     def add_player(self, instance):
         name = self.player_name_input.text.strip()
         if name:
-            index = len(self.players) + 1
-            frame = PlayerFrame(index, name, on_buy_callback=self.update_total_buy, on_log_callback=self.log_event)
-            self.players_layout.add_widget(frame)
-            self.players.append(frame)
+            self.player_list.add_player(name)
+            self._seated.add(name.lower())
+            if self.name_index is not None:
+                self.name_index.add(name)
             self.player_name_input.text = ""
-            self.log_event(f"Player added: {name.capitalize()}")
-            self.update_total_buy()
+            self.log_event(f"Player added: {name.capitalize()}", name)
             self.save_game_data()
 
-    def update_total_buy(self):
-        total = sum(player.get_total_buy() for player in self.players)
-        self.total_buy_label.text = str(total)
+    def add_players(self, names):
+        """Add every name not already at the table in one list update; return the names added"""
+        seated = {player.name.lower() for player in self.ledger.players}
+        added = []
+        for name in names:
+            key = name.lower()
+            if key not in seated:
+                seated.add(key)
+                added.append(name)
+        if added:
+            self.player_list.add_players(added)
+            self._seated.update(seated)
+            if self.name_index is not None:
+                for name in added:
+                    self.name_index.add(name)
+            self.log_event(f"Players imported ({len(added)}): {', '.join(name.capitalize() for name in added)}",
+                           tuple(added))
+            self.save_game_data()
+        return added
+
+    def on_name_focus(self, instance, value):
+        if value:
+            self._seated = {player.name.lower() for player in self.ledger.players}
+            if self.name_index is None:
+                self.load_name_index()
+
+    def load_name_index(self):
+        """Index the archived players' names on a worker thread, most played first"""
+        if self._name_index_thread is not None:
+            return
+        history = self.history
+
+        def run():
+            from names import NameIndex
+            index = NameIndex()
+            try:
+                for name, sessions in history.player_name_counts():
+                    index.add(name, sessions)
+            except Exception as e:
+                print(f"Error loading player names: {e}")
+            Clock.schedule_once(lambda dt: self.set_name_index(index))
+
+        self._name_index_thread = threading.Thread(target=run, name='NameIndex', daemon=True)
+        self._name_index_thread.start()
+
+    def set_name_index(self, index):
+        for player in self.ledger.players:
+            index.add(player.name)
+        self.name_index = index
+        self.update_name_suggestions()
+
+    def update_name_suggestions(self, *args):
+        """Show the best known names for what has been typed, leaving out players already at the table"""
+        names = []
+        if self.name_index is not None:
+            names = self.name_index.complete(self.player_name_input.text, self.NAME_SUGGESTIONS, self._seated)
+        # children are kept in reverse order of adding
+        for button, name in zip(reversed(self.name_suggestions.children), names + [""] * self.NAME_SUGGESTIONS):
+            button.text = name
+            button.opacity = 1 if name else 0
+            button.disabled = not name
+        self.name_suggestions.height = dp(36) if names else 0
+
+    def pick_name_suggestion(self, button):
+        self.player_name_input.text = button.text
+        self.add_player(button)
+
+    def show_roster_import(self, instance):
+        """Show the roster import popup; it is built once, on first use"""
+        if self._roster_popup is None:
+            from kivy.uix.popup import Popup
+            content = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
+            content.add_widget(Label(text="Paste names, one per line or as CSV,\nor give the path of a .csv or .txt file.",
+                                     font_size=sp(14), halign='center', size_hint_y=None, height=dp(50)))
+            self.roster_path_input = TextInput(hint_text="File path", multiline=False, font_size=sp(14),
+                                               size_hint_y=None, height=dp(40))
+            content.add_widget(self.roster_path_input)
+            self.roster_text_input = TextInput(hint_text="Names...", multiline=True, font_size=sp(14))
+            content.add_widget(self.roster_text_input)
+            self.roster_status = Label(text="", font_size=sp(14), size_hint_y=None, height=dp(30))
+            content.add_widget(self.roster_status)
+
+            popup = Popup(title='Import Roster', content=content, size_hint=(0.9, 0.8))
+            buttons = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(50), spacing=dp(10))
+            import_button = Button(text="Import")
+            import_button.bind(on_press=lambda x: self.import_roster(popup))
+            buttons.add_widget(import_button)
+            cancel_button = Button(text="Cancel")
+            cancel_button.bind(on_press=popup.dismiss)
+            buttons.add_widget(cancel_button)
+            content.add_widget(buttons)
+            self._roster_popup = popup
+        self.roster_status.text = ""
+        self._roster_popup.open()
+
+    def import_roster(self, popup):
+        """Add the players of the pasted roster, or of the roster file if a path is given"""
+        path = self.roster_path_input.text.strip()
+        try:
+            if path:
+                with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                    added = self.add_players(read_roster(f))
+            else:
+                added = self.add_players(read_roster(self.roster_text_input.text.splitlines()))
+        except Exception as e:
+            print(f"Error importing roster: {e}")
+            self.roster_status.text = f"Error: {e}"
+            return
+        if added:
+            self.roster_text_input.text = ""
+            popup.dismiss()
+        else:
+            self.roster_status.text = "No new players found"
+
+    def on_ledger_event(self, event):
+        """Mark the parts of the screen a ledger change affects"""
+        kind = event[0]
+        instrumentation.count(kind)
+        if kind == 'buy':
+            self.mark_dirty(rows=(event[1],), labels=('total_buy',))
+        elif kind in ('add_player', 'remove_player'):
+            self.mark_dirty(labels=('total_buy',))
+        # Chips and debt come from the row inputs themselves; sums wait for Calculate
+
+    def mark_dirty(self, rows=(), all_rows=None, labels=()):
+        """Queue rows and summary labels for the next UI pass
+
+        all_rows is 'totals' to refresh every visible row's derived labels or
+        'full' to also reset their inputs from the ledger.
+        """
+        self._dirty_rows.update(rows)
+        if all_rows and self._dirty_all_rows != 'full':
+            self._dirty_all_rows = all_rows
+        self._dirty_labels.update(labels)
+        self._ui_trigger()
+
+    def flush_ui(self, *args):
+        """Draw everything marked dirty since the last frame in one pass"""
+        if self._dirty_all_rows:
+            self.player_list.refresh_rows(full=self._dirty_all_rows == 'full')
+        elif self._dirty_rows:
+            self.player_list.refresh_rows(self._dirty_rows)
+        for name in self._dirty_labels:
+            getattr(self, self.SUMMARY_LABELS[name]).text = str(getattr(self.ledger, name))
+        self._dirty_rows.clear()
+        self._dirty_all_rows = None
+        self._dirty_labels.clear()
+
+    def on_buy(self):
+        """Called after a player buys in"""
+        self.save_game_data()
 
+    @instrumentation.timed
     def calculate_all(self, instance):
         self.log_event("--- Calculate All ---")
-        total_chips = sum(player.calculate_sum(log_changes=True) for player in self.players)
-        self.total_chips_label.text = str(total_chips)
+        total_chips = self.player_list.calculate_all_sums(log_changes=True)
+        self.mark_dirty(all_rows='totals', labels=('total_chips',))
         self.log_event(f"Total Chips: {total_chips}")
-        self.log_event(f"Total Buy-Ins: {self.total_buy_label.text}")
+        self.log_event(f"Total Buy-Ins: {self.ledger.total_buy}")
         self.save_game_data()
     
+    def show_settlement(self, instance):
+        """Work out who pays whom, settling each player's chips minus debt against the cash in the pot"""
+        from kivy.uix.popup import Popup
+        from settlement import settle, balances_from_ledger
+        transfers = settle(balances_from_ledger(self.ledger))
+        self.log_event("--- Settlement ---")
+        lines = []
+        for payer, payee, amount in transfers:
+            line = f"{payer.capitalize()} pays {payee.capitalize()} {amount}"
+            self.log_event(line, (payer, payee))
+            lines.append(line)
+        
+        content = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
+        note = Label(text="Each player gets chips minus debt (Sum); the pot pays back the cash bought in.",
+                     font_size=sp(12), size_hint_y=None, height=dp(40), halign='center', valign='middle')
+        note.bind(size=note.setter('text_size'))
+        content.add_widget(note)
+        transfers_view = LineView(size_hint=(1, 1))
+        if lines:
+            transfers_view.set_lines(lines)
+        else:
+            transfers_view.show_message("Everyone is square.")
+        content.add_widget(transfers_view)
+        
+        popup = Popup(title=f'Settlement ({len(lines)} transfers)', content=content, size_hint=(0.9, 0.7))
+        close_button = Button(text="Close", size_hint_y=None, height=dp(50))
+        close_button.bind(on_press=popup.dismiss)
+        content.add_widget(close_button)
+        popup.open()
+
+    @instrumentation.timed
     def save_game_data(self):
-        """Save current game state to file"""
-        try:
-            game_data = {
-                'date': self.date_display.text,
-                'comments': self.comments_input.text,
-                'players': [player.get_player_data() for player in self.players],
-                'total_buy': self.total_buy_label.text,
-                'total_chips': self.total_chips_label.text
-            }
-            with open(self.save_file_path, 'w', encoding='utf-8') as f:
-                json.dump(game_data, f, indent=2)
-            print(f"Game data saved to {self.save_file_path}")
-        except Exception as e:
-            print(f"Error saving game data: {e}")
+        """Commit held-back edits to the journal once changes have been quiet for SAVE_DELAY seconds
+
+        Every other mutation is journaled as it happens, and the journal writes
+        full snapshots through the save worker on its own schedule.
+        """
+        self._save_trigger.cancel()
+        self._save_trigger()
+
+    @instrumentation.timed
+    def write_game_data(self, *args):
+        self._save_trigger.cancel()
+        self.journal.flush()
+
+    def flush_game_data(self):
+        """Commit held-back edits now and wait until any pending snapshot is on disk"""
+        self.write_game_data()
+        self.save_worker.flush()
     
-    def load_game_data(self):
-        """Load game state from file"""
+    def restore_game_data(self):
+        """Load saved data without holding up the first frame
+
+        The snapshot is read and the journal replayed on a worker thread, then the
+        player rows are added RESTORE_CHUNK at a time, one chunk per frame, so the
+        list lays out once per chunk. The Game tab is disabled and a progress bar
+        shown until every row is in. The whole restore is always timed, as it is
+        over before timing can be switched on.
+        """
+        if not self.journal.has_saved_data():
+            print("No saved game data found")
+            return
+        from kivy.uix.progressbar import ProgressBar
+        self._restore_started = time.perf_counter()
+        self.restoring = True
+        self.game_layout.disabled = True
+        self.restore_progress = ProgressBar(max=1, value=0, size_hint_y=None, height=dp(10))
+        self.game_layout.add_widget(self.restore_progress, index=self.game_layout.children.index(self.player_list) + 1)
+        self._restore_thread = threading.Thread(target=self._read_saved_game, name='Restore', daemon=True)
+        self._restore_thread.start()
+
+    @instrumentation.timed
+    def _read_saved_game(self):
         try:
-            if not os.path.exists(self.save_file_path):
-                print("No saved game data found")
-                return
+            ledger = self.journal.load()
+        except Exception as e:
+            print(f"Error loading game data: {e}")
+            ledger = None
+        Clock.schedule_once(lambda dt: self._begin_restore(ledger))
+
+    def _begin_restore(self, ledger):
+        if ledger is None:
+            self._finish_restore()
+            return
+        self.set_ledger(ledger, sync_rows=False)
+        self.player_list.data = []
+        self.restore_progress.max = max(len(ledger), 1)
+        Clock.schedule_interval(self._restore_chunk, 0)
+
+    @instrumentation.timed
+    def _restore_chunk(self, dt):
+        """Add the next chunk of player rows"""
+        rows = self.player_list.data
+        players = self.ledger.players[len(rows):len(rows) + self.RESTORE_CHUNK]
+        rows.extend(PlayerList.new_row_data(player) for player in players)
+        self.restore_progress.value = len(rows)
+        if len(rows) < len(self.ledger):
+            return True
+        ms = (time.perf_counter() - self._restore_started) * 1000
+        instrumentation.record('restore_game_data', ms)
+        self.log_event("Game data loaded from previous session")
+        print(f"Game data loaded from {self.save_file_path} in {ms:.0f} ms")
+        self._finish_restore()
+        return False
+
+    def _finish_restore(self):
+        self.game_layout.remove_widget(self.restore_progress)
+        self.restore_progress = None
+        self.game_layout.disabled = False
+        self.restoring = False
+
+    def set_ledger(self, ledger, sync_rows=True):
+        """Replace the game state and render it"""
+        self.ledger = self.player_list.ledger = ledger
+        if self.on_ledger_event not in ledger.listeners:
+            ledger.listeners.append(self.on_ledger_event)
+        if self.sync_client is not None:
+            self.sync_client.attach(ledger)
+        self.date_display.text = ledger.date
+        self.comments_input.text = ledger.comments
+        if sync_rows:
+            self.player_list.sync_from_ledger()
+        self._dirty_rows.clear()
+        self.mark_dirty(labels=('total_buy', 'total_chips'))
+
+    def render_ledger(self):
+        """Bring the player rows and totals in line with the ledger after an undo or redo"""
+        rows = self.player_list.data
+        while len(rows) > len(self.ledger):
+            rows.pop()
+        while len(rows) < len(self.ledger):
+            rows.append(PlayerList.new_row_data(self.ledger.players[len(rows)]))
+        self.comments_input.text = self.ledger.comments
+        self.mark_dirty(all_rows='full', labels=('total_buy', 'total_chips'))
+
+    def undo(self, instance):
+        event = self.journal.undo()
+        if event:
+            self.log_event(f"Undo: {self.ledger.describe(event)}", self.ledger.event_player(event))
+            self.render_ledger()
+
+    def redo(self, instance):
+        event = self.journal.redo()
+        if event:
+            self.log_event(f"Redo: {self.ledger.describe(event)}", self.ledger.event_player(event))
+            self.render_ledger()
+
+    def confirm_clear_data(self, instance):
+        """Show confirmation popup before clearing data; it is built once, on first use"""
+        if self._clear_popup is None:
+            from kivy.uix.popup import Popup
+            content = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
+            content.add_widget(Label(text="Are you sure you want to clear all data?\nThe game will be archived to history.", 
+                                    font_size=sp(16), halign='center'))
             
-            with open(self.save_file_path, 'r', encoding='utf-8') as f:
-                game_data = json.load(f)
+            buttons = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(50), spacing=dp(10))
             
-            # Restore date and comments
-            if 'date' in game_data:
-                self.date_display.text = game_data['date']
-            if 'comments' in game_data:
-                self.comments_input.text = game_data['comments']
+            popup = Popup(title='Clear All Data', content=content, size_hint=(0.8, 0.4))
             
-            # Restore players
-            if 'players' in game_data:
-                for player_data in game_data['players']:
-                    index = len(self.players) + 1
-                    frame = PlayerFrame(index, player_data['name'], 
-                                      on_buy_callback=self.update_total_buy, 
-                                      on_log_callback=self.log_event)
-                    frame.set_player_data(player_data)
-                    self.players_layout.add_widget(frame)
-                    self.players.append(frame)
+            yes_button = Button(text="Yes, Clear All", background_color=(0.8, 0.2, 0.2, 1))
+            yes_button.bind(on_press=lambda x: self.clear_all_data(popup))
+            buttons.add_widget(yes_button)
             
-            # Restore totals
-            if 'total_buy' in game_data:
-                self.total_buy_label.text = game_data['total_buy']
-            if 'total_chips' in game_data:
-                self.total_chips_label.text = game_data['total_chips']
+            no_button = Button(text="Cancel")
+            no_button.bind(on_press=popup.dismiss)
+            buttons.add_widget(no_button)
             
-            self.log_event("Game data loaded from previous session")
-            print(f"Game data loaded from {self.save_file_path}")
-        except Exception as e:
-            print(f"Error loading game data: {e}")
-    
-    def confirm_clear_data(self, instance):
-        """Show confirmation popup before clearing data"""
-        content = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
-        content.add_widget(Label(text="Are you sure you want to clear all data?\nThis cannot be undone.", 
-                                font_size=sp(16), halign='center'))
-        
-        buttons = BoxLayout(orientation='horizontal', size_hint_y=None, height=dp(50), spacing=dp(10))
-        
-        popup = Popup(title='Clear All Data', content=content, size_hint=(0.8, 0.4))
-        
-        yes_button = Button(text="Yes, Clear All", background_color=(0.8, 0.2, 0.2, 1))
-        yes_button.bind(on_press=lambda x: self.clear_all_data(popup))
-        buttons.add_widget(yes_button)
-        
-        no_button = Button(text="Cancel")
-        no_button.bind(on_press=popup.dismiss)
-        buttons.add_widget(no_button)
-        
-        content.add_widget(buttons)
-        popup.open()
+            content.add_widget(buttons)
+            self._clear_popup = popup
+        self._clear_popup.open()
     
     def clear_all_data(self, popup):
         """Clear all game data"""
         try:
-            # Clear all players
-            self.players_layout.clear_widgets()
-            self.players = []
-            
-            # Reset totals
-            self.total_buy_label.text = "0"
-            self.total_chips_label.text = "0"
-            
-            # Clear comments
-            self.comments_input.text = ""
-            
-            # Reset date to today
-            self.date_display.text = datetime.now().strftime("%Y-%m-%d")
+            # Archive the finished game in the background before it is cleared
+            self.write_game_data()
+            if len(self.ledger):
+                self.history.archive_async(self.ledger.to_dict())
             
-            # Delete save file
-            if os.path.exists(self.save_file_path):
-                os.remove(self.save_file_path)
+            # Clear all players, totals and comments, reset date to today,
+            # and delete the journal and snapshot
+            self.set_ledger(self.journal.start_new())
             
             # Reinitialize log file
             self.init_log_file()
@@ -0,0 +1,76 @@
+"""Journal and snapshot round trips: mutate, close, load, compare."""
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from journal import Journal  # noqa: E402
+from savestate import SaveWorker  # noqa: E402
+from snapshot import encode as encode_snapshot  # noqa: E402
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix='taki-test-')
+        self.workers = []
+
+    def tearDown(self):
+        for worker in self.workers:
+            worker.close()
+
+    def open(self, snapshot_every):
+        save_path = os.path.join(self.folder, 'game.bin')
+        worker = SaveWorker(save_path, encode=encode_snapshot)
+        self.workers.append(worker)
+        return Journal(save_path, os.path.join(self.folder, 'journal'), worker, snapshot_every=snapshot_every)
+
+    def reload(self, journal, snapshot_every):
+        journal.close()
+        journal.save_worker.flush()
+        return self.open(snapshot_every).load()
+
+    def assertSameGame(self, loaded, ledger):
+        self.assertEqual(loaded.to_dict(), ledger.to_dict())
+        self.assertEqual((loaded.total_buy, loaded.total_chips, loaded.total_debt),
+                         (ledger.total_buy, ledger.total_chips, ledger.total_debt))
+
+    def test_snapshot_after_held_back_edit(self):
+        # The chips edit is written when the buy arrives and reaches the snapshot threshold
+        journal = self.open(snapshot_every=2)
+        ledger = journal.start_new()
+        ledger.add_player("Ann")
+        ledger.set_chips(0, 5)
+        ledger.buy(0, 10)
+        loaded = self.reload(journal, 2)
+        self.assertEqual(loaded.total_buy, 10)
+        self.assertSameGame(loaded, ledger)
+
+    def test_random_session_round_trip(self):
+        rng = random.Random(7)
+        for snapshot_every in (1, 2, 3, 5, 100):
+            with self.subTest(snapshot_every=snapshot_every):
+                journal = self.open(snapshot_every)
+                ledger = journal.start_new()
+                for step in range(300):
+                    choice = rng.random()
+                    if not len(ledger) or choice < 0.1:
+                        ledger.add_player(f"player{len(ledger)}")
+                    elif choice < 0.4:
+                        ledger.buy(rng.randrange(len(ledger)), rng.choice((20, 50, 100)), when=step)
+                    elif choice < 0.65:
+                        ledger.set_chips(rng.randrange(len(ledger)), rng.randrange(500))
+                    elif choice < 0.8:
+                        ledger.set_debt(rng.randrange(len(ledger)), rng.choice((0, 50)))
+                    elif choice < 0.9:
+                        ledger.set_comments(f"note {step}")
+                    else:
+                        journal.undo()
+                self.assertSameGame(self.reload(journal, snapshot_every), ledger)
+
+
+if __name__ == '__main__':
+    unittest.main()
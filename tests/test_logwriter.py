@@ -0,0 +1,40 @@
+"""Log rotation, pruning and indexed search."""
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logwriter import LogWriter  # noqa: E402
+
+
+class LogWriterTest(unittest.TestCase):
+
+    def test_pruned_segments_leave_no_index_entries(self):
+        folder = tempfile.mkdtemp(prefix='taki-test-')
+        writer = LogWriter(os.path.join(folder, 'log.txt'), max_bytes=2000, keep=2)
+        writer.PRUNE_BATCH = 7  # several batches per pruned segment
+        for i in range(1000):
+            writer.write(f"[x] line {i}\n", 1000 + i, f"p{i % 3}")
+            if i % 50 == 0:
+                writer.flush()
+        writer.close()
+
+        db = sqlite3.connect(os.path.join(folder, 'log.index.db'))
+        segments = [segment for (segment,) in db.execute("SELECT id FROM segments ORDER BY id")]
+        indexed = [segment for (segment,) in db.execute("SELECT DISTINCT segment FROM entries ORDER BY segment")]
+        db.close()
+        self.assertEqual(len(segments), 3)  # two archives and the active segment
+        self.assertEqual(indexed, segments[:len(indexed)])  # the active segment may still be empty
+
+        reopened = LogWriter(os.path.join(folder, 'log.txt'))
+        found = reopened.find(player='p0', limit=10000)
+        reopened.close()
+        self.assertEqual(found[-1], (1999, "[x] line 999"))
+        self.assertTrue(all(line.endswith(f"line {when - 1000}") for when, line in found))
+
+
+if __name__ == '__main__':
+    unittest.main()
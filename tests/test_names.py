@@ -0,0 +1,37 @@
+"""Name suggestions from the prefix index."""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from names import NameIndex, read_roster  # noqa: E402
+
+
+class NameIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = NameIndex(limit=4)
+        for i in range(10):
+            self.index.add(f"Al{i}", 10 - i)  # Al0 plays most
+
+    def test_best_first(self):
+        self.assertEqual(self.index.complete("al", 3), ["Al0", "Al1", "Al2"])
+
+    def test_skipped_names_do_not_empty_the_list(self):
+        seated = {"al0", "al1", "al2", "al3", "al4"}
+        self.assertEqual(self.index.complete("al", 3, seated), ["Al5", "Al6", "Al7"])
+
+    def test_extra_weight_reorders(self):
+        self.index.add("al9", 20)
+        self.assertEqual(self.index.complete("AL", 2), ["Al9", "Al0"])
+
+
+class ReadRosterTest(unittest.TestCase):
+
+    def test_name_column_and_repeats(self):
+        self.assertEqual(list(read_roster(["phone,name", "1,Ann", "2,", "3,ann", "4,Bob"])), ["Ann", "Bob"])
+
+
+if __name__ == '__main__':
+    unittest.main()
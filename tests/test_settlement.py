@@ -0,0 +1,36 @@
+"""Settling a ledger's players against the pot."""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger import Ledger  # noqa: E402
+from settlement import POT, UNACCOUNTED, balances_from_ledger, settle  # noqa: E402
+
+
+def ledger_of(*players):
+    ledger = Ledger()
+    for name, total_buy, chips, debt in players:
+        ledger.add_player(name, total_buy, chips, debt)
+    return ledger
+
+
+class SettlementTest(unittest.TestCase):
+
+    def test_cash_paid_in_is_not_charged_again(self):
+        # Ann paid 100 cash and lost it all; Bob bought 100 on credit and ended with 200
+        ledger = ledger_of(("Ann", 100, 0, 0), ("Bob", 100, 200, 100))
+        self.assertEqual(sorted(settle(balances_from_ledger(ledger))), [(POT, "Bob", 100)])
+
+    def test_all_on_credit_settles_between_players(self):
+        ledger = ledger_of(("Ann", 100, 20, 100), ("Bob", 50, 130, 50))
+        self.assertEqual(settle(balances_from_ledger(ledger)), [("Ann", "Bob", 80)])
+
+    def test_missing_chips_are_unaccounted(self):
+        ledger = ledger_of(("Ann", 100, 90, 0))
+        self.assertEqual(settle(balances_from_ledger(ledger)), [(POT, "Ann", 90), (POT, UNACCOUNTED, 10)])
+
+
+if __name__ == '__main__':
+    unittest.main()
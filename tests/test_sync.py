@@ -0,0 +1,144 @@
+"""Two clients syncing through a SyncServer on localhost."""
+import asyncio
+import os
+import queue
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from journal import Journal  # noqa: E402
+from ledger import Ledger  # noqa: E402
+from savestate import SaveWorker  # noqa: E402
+from snapshot import encode as encode_snapshot  # noqa: E402
+from sync import SyncClient, SyncServer  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class SyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.port = free_port()
+        self.server = SyncServer()
+        threading.Thread(target=lambda: asyncio.run(self.server.serve('127.0.0.1', self.port)), daemon=True).start()
+        time.sleep(0.2)
+        self.main_queue = queue.Queue()
+        self.clients = []
+
+    def tearDown(self):
+        for client in self.clients:
+            client.stop()
+
+    def connect(self, ledger, applying=None):
+        client = SyncClient('127.0.0.1', self.port, self.main_queue.put, applying=applying)
+        client.attach(ledger)
+        client.start()
+        self.clients.append(client)
+        return client
+
+    def pump(self, done, timeout=5.0):
+        """Run the clients' main-thread work until done() holds; fail if it never does"""
+        end = time.perf_counter() + timeout
+        while time.perf_counter() < end:
+            try:
+                self.main_queue.get(timeout=0.005)()
+            except queue.Empty:
+                pass
+            for client in self.clients:
+                client.flush()
+            if done() and self.main_queue.empty() and not any(c.pending or c.in_flight for c in self.clients):
+                return
+        self.fail("clients did not settle")
+
+    def server_total(self, name):
+        return self.server.players[name.lower()][2]
+
+    def test_join_with_same_player_keeps_server_state(self):
+        a, b = Ledger(), Ledger()
+        a.add_player("Bob")
+        a.buy(0, 300)
+        self.connect(a)
+        self.pump(lambda: 'bob' in self.server.players)
+
+        b.add_player("bob")
+        b.buy(0, 50)
+        self.connect(b)
+        self.pump(lambda: b.players[0].total_buy == 300)
+        self.assertEqual(self.server_total("Bob"), 300)
+        self.assertEqual(a.players[0].total_buy, 300)
+
+    def test_restart_does_not_overwrite_newer_changes(self):
+        a, b = Ledger(), Ledger()
+        a.add_player("Bob")
+        a.buy(0, 300)
+        first = self.connect(a)
+        self.connect(b)
+        self.pump(lambda: len(b) == 1 and b.players[0].total_buy == 300)
+
+        # A goes away; B keeps dealing
+        first.stop()
+        self.clients.remove(first)
+        b.buy(0, 20)
+        self.pump(lambda: self.server_total("Bob") == 320)
+
+        # A comes back with the ledger it saved before leaving
+        restored = Ledger.from_dict(a.to_dict())
+        self.connect(restored)
+        self.pump(lambda: restored.players[0].total_buy == 320)
+        self.assertEqual(self.server_total("Bob"), 320)
+        self.assertEqual(b.players[0].total_buy, 320)
+
+    def test_buys_after_join_reach_everyone(self):
+        a, b = Ledger(), Ledger()
+        a.add_player("Bob")
+        a.buy(0, 100)
+        self.connect(a)
+        self.pump(lambda: 'bob' in self.server.players)
+
+        b.add_player("Bob")
+        b.buy(0, 40)  # made offline, before B knew the server had Bob
+        self.connect(b)
+        self.pump(lambda: b.players[0].total_buy == 100)
+        b.buy(0, 25)
+        self.pump(lambda: a.players[0].total_buy == 125)
+        self.assertEqual(b.players[0].total_buy, 125)
+
+    def test_remote_changes_are_not_undoable(self):
+        folder = tempfile.mkdtemp(prefix='taki-test-')
+        save_path = os.path.join(folder, 'game.bin')
+        save_worker = SaveWorker(save_path, encode=encode_snapshot)
+        journal = Journal(save_path, os.path.join(folder, 'journal'), save_worker)
+        a, b = journal.start_new(), Ledger()
+        a.add_player("Ann")
+        a.buy(0, 50)
+        self.connect(a, applying=journal.remote)
+        self.connect(b)
+        self.pump(lambda: len(b) == 1)
+
+        b.buy(0, 100)
+        self.pump(lambda: a.players[0].total_buy == 150)
+        self.assertEqual(journal.undo(), ('buy', 0, 50, a.buy_ins[0][2]))
+        self.pump(lambda: b.players[0].total_buy == 100)
+        self.assertEqual(a.players[0].total_buy, 100)
+        self.assertIsNotNone(journal.redo())
+        self.pump(lambda: b.players[0].total_buy == 150)
+
+        # A player joining from elsewhere moves seats, so the local history can't be undone any more
+        b.add_player("Cy")
+        self.pump(lambda: len(a) == 2)
+        self.assertIsNone(journal.undo())
+        journal.close()
+        save_worker.close()
+
+
+if __name__ == '__main__':
+    unittest.main()